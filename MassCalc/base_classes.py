@@ -1,5 +1,8 @@
 import numpy as np
 import collections
+import sys
+
+from flat_tree import flat_tree, cubic_metrics, quadratic_metrics
 
 def hr(text='', ch='-', width=80):
     tl = len(text)
@@ -9,23 +12,170 @@ def hr(text='', ch='-', width=80):
     return '%s %s %s\n' % (ch*ll, text, ch*rl)
 #end def
 
-class material:
-    def __init__(self, density, cost):
-        self.density = density
-        self.cost    = cost
+def format_data(x, ys, w=None):
+    s = ''
+    if w is None: w = range(len(x))
+    max_wx  = max(len(str(x[i])) for i in w)
+    max_wys = [max(len(str(y[i])) for i in w) for y in ys]
+    for i in w: 
+        s += '%s%s ' % (x[i], ' '*(max_wx-len(str(x[i]))))
+        for y, myw in zip(ys, max_wys): 
+            s += ': %s%s ' % (y[i], ' '*(myw-len(str(y[i]))))
+        s += '\n'
+    return s
+#end def
+
+def write_lines(lines, out=None):
+    if out is None: out = sys.stdout
+    for line in lines:
+        out.write(line)
+        out.write('\n')
+#end def
+
+class intern_table(object):
+    '''
+    Hash-consing table of the tree nodes: a node constructed with the same
+    parameters as an existing one is that node. Nodes are never modified
+    after construction, so an interned subtree may be shared by any number
+    of parents and its evaluations are computed once.
+    '''
+    def __init__(self):
+        self.nodes = {}
+        self.hits  = 0
+
+    def get(self, key, build):
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = build()
+            node._key = key
+        else: self.hits += 1
+        return node
+    #end def
+
+    def clear(self):
+        self.nodes = {}
+        self.hits  = 0
+    #end def
+
+    def prune(self, roots):
+        '''
+        Drops the nodes that are not in the subtrees of the root volumes,
+        e.g. those of the parts rebuilt after a reload, which would otherwise
+        be kept by the table forever; returns the number of dropped nodes.
+        '''
+        live  = set()
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if id(node) in live: continue
+            live.add(id(node))
+            stack.extend(key_nodes(node._key))
+            if isinstance(node, volume):
+                stack.extend(node._subvolumes)
+                if node._surface is not None: stack.append(node._surface)
+        n = len(self.nodes)
+        self.nodes = dict((k, v) for k, v in self.nodes.items() if id(v) in live)
+        return n-len(self.nodes)
+    #end def
 #end class
 
+interned = intern_table()
+
+
+def intern_key(x):
+    '''
+    Hashable key of a construction parameter. Interned nodes are their own keys,
+    sequences are tuples of the keys of their items, floats and strings
+    (most of the parameters) are themselves, dicts and other objects are
+    tagged with their type: (type, flat items) or (type, object), so that
+    parameters that compare equal but differ in type (1, 1.0 and True)
+    give different nodes. A tag is never an item of a sequence key.
+    Raises TypeError if the parameter cannot be a part of a key.
+    '''
+    if isinstance(x, (list, tuple)):
+        return tuple(intern_key(i) for i in x)
+    if isinstance(x, dict):
+        return (dict, kwargs_key(x))
+    if isinstance(x, (surface, volume)):
+        if x._key is None: raise TypeError('%s is not interned' % x.__class__.__name__)
+        return x
+    hash(x)
+    if type(x) in (float, str): return x
+    return (type(x), x)
+#end def
+
 
-class surface:
+def key_nodes(key):
+    '''Generates the interned nodes of an intern key'''
+    if isinstance(key, (surface, volume)): yield key
+    elif isinstance(key, tuple):
+        for k in key:
+            for node in key_nodes(k): yield node
+#end def
+
+
+def kwargs_key(kwargs):
+    '''Flat tuple (name, key, name, key...) of the keyword parameters, sorted by name'''
+    key = ()
+    for k in sorted(kwargs): key += (k, intern_key(kwargs[k]))
+    return key
+#end def
+
+
+class interned_type(type):
+    '''Metaclass of the nodes that are interned by their construction parameters'''
+    def __call__(cls, *args, **kwargs):
+        try: key = (cls, intern_key(args), kwargs_key(kwargs))
+        except TypeError: return type.__call__(cls, *args, **kwargs)
+        return interned.get(key, lambda: type.__call__(cls, *args, **kwargs))
+    #end def
+#end class
+
+
+class material(object):
+    '''
+    Density and cost per unit of a material. Materials are shared by any
+    number of nodes and are parts of their intern keys, so they are immutable.
+    '''
+    __slots__ = ('density', 'cost', 'name')
+
+    def __init__(self, density, cost, name=None):
+        object.__setattr__(self, 'density', density)
+        object.__setattr__(self, 'cost',    cost)
+        object.__setattr__(self, 'name',    name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('material is immutable')
+
+    def __reduce__(self):
+        return (material, (self.density, self.cost, self.name))
+#end class
+
+
+class surface(object):
+    __metaclass__ = interned_type
+    __slots__ = ('_S', 'h', 'm', '_key')
     unit_h = 0.005
     
     def __init__(self, S, h, m):
         self._S   = S
         self.h    = h
         self.m    = m
+        self._key = None
 
     def set_pcs(self, n): self._S *= n
     
+    def scaled(self, n):
+        '''The surface of n such pieces'''
+        if n == 1: return self
+        return interned.get(('pcs', self, n), lambda: self._copy(n))
+    
+    def _copy(self, n):
+        s = surface.__new__(surface)
+        for a in surface.__slots__: setattr(s, a, getattr(self, a))
+        s.set_pcs(n)
+        return s
+    
     def S(self, scale=1, length=1):
         return self._S*scale**2*length  
     
@@ -42,19 +192,99 @@ class surface:
 #end class
 
 
-class volume:
+class evaluation(object):
+    '''
+    All metrics of a volume at the given scale and length,
+    computed together with the evaluations of its subvolumes
+    in a single traversal of the tree.
+
+    Every metric is proportional either to scale**3*length (volumes and
+    their mass and cost) or to scale**2*length (surfaces), so the evaluation
+    at scale=1, length=1 holds the coefficients of all of them
+    and the evaluation at any other size is obtained with at().
+    '''
+    cubic     = cubic_metrics
+    quadratic = quadratic_metrics
+    __slots__ = ('volume', 'scale', 'length', 'subvolumes',
+                 'full_cost', 'full_mass')+cubic_metrics+quadratic_metrics
+    
+    def __init__(self, vol, scale, length, subvolumes):
+        self.volume     = vol
+        self.scale      = scale
+        self.length     = length
+        self.subvolumes = subvolumes
+        #volume and surface area
+        self.full_V = vol.full_V(scale, length)
+        self.V      = self.full_V - sum(sv.full_V for sv in subvolumes)
+        assert self.V>=0, \
+        ("Combined volume of sub-volumes is greater than the volume of '%s'" % vol.name)
+        self.S      = vol.S(scale, length)
+        self.full_S = self.S + sum(sv.full_S for sv in subvolumes)
+        #cost
+        self.V_cost      = self.V*vol._cost
+        self.S_cost      = vol.S_cost(scale, length)
+        self.full_V_cost = self.V_cost + sum(sv.full_V_cost for sv in subvolumes)
+        self.full_S_cost = self.S_cost + sum(sv.full_S_cost for sv in subvolumes)
+        self.full_cost   = self.full_V_cost + self.full_S_cost
+        #mass
+        self.V_mass      = self.V*vol.d
+        self.S_mass      = vol.S_mass(scale, length)
+        self.full_V_mass = self.V_mass + sum(sv.full_V_mass for sv in subvolumes)
+        self.full_S_mass = self.S_mass + sum(sv.full_S_mass for sv in subvolumes)
+        self.full_mass   = self.full_V_mass + self.full_S_mass
+    #end def
+
+    def at(self, scale, length):
+        '''
+        The evaluation at another size from this one made at scale=1, length=1;
+        scale and length may be arrays, then so are the metrics.
+        '''
+        ev = evaluation.__new__(evaluation)
+        ev.volume = self.volume
+        ev.scale  = scale
+        ev.length = length
+        k3 = scale**3*length
+        k2 = scale**2*length
+        for m in self.cubic:     setattr(ev, m, getattr(self, m)*k3)
+        for m in self.quadratic: setattr(ev, m, getattr(self, m)*k2)
+        ev.full_cost  = ev.full_V_cost + ev.full_S_cost
+        ev.full_mass  = ev.full_V_mass + ev.full_S_mass
+        ev.subvolumes = tuple(sv.at(scale, length) for sv in self.subvolumes)
+        return ev
+    #end def
+
+    def walk(self, depth=0):
+        '''Yields (depth, evaluation) for this node and all its subnodes, depth first'''
+        yield depth, self
+        for sv in self.subvolumes:
+            for rec in sv.walk(depth+1): yield rec
+    #end def
+#end class
+
+
+class volume(object):
+    __metaclass__ = interned_type
+    #the components add their own attributes, so their instances have __dict__ too
+    __slots__ = ('_V', 'name', '_surface', '_subvolumes', 'pcs', '_mat', 'd', '_cost',
+                 '_evaluations', '_unit', '_key')
+    
     def __init__(self, vol, name, **kwargs):
         #main parameters
         self._V    = float(vol)
         self.name  = name
-        #surface and subvolumes
+        self._key  = None
+        #surface and subvolumes; the evaluations are kept only once requested
         self._surface = kwargs.get('S', None)
-        self._subvolumes = kwargs.get('V', [])
+        self._subvolumes = tuple(kwargs.get('V', ()))
+        self._evaluations = None
+        self._unit = None
         #counterparts of this volume
         n = kwargs.get('N', 1.0)
-        self.set_pcs(n)
+        self.pcs = 1.0
+        if n != 1: self.set_pcs(n)
         #cost, mass and density
         mat = kwargs.get('material', None)
+        self._mat = mat if isinstance(mat, material) else None
         if isinstance(mat, material):
             self.d = mat.density
             self._cost = mat.cost
@@ -72,15 +302,60 @@ class volume:
     #end def
 
     def set_pcs(self, n):
+        #surface and subvolumes may be shared, so they are replaced, not changed
         self._V *= n
-        if self._surface is not None: self._surface.set_pcs(n)
-        map(lambda sv: sv.set_pcs(n), self._subvolumes)
+        self.pcs *= n
+        if self._surface is not None: self._surface = self._surface.scaled(n)
+        self._subvolumes = tuple(sv.scaled(n) for sv in self._subvolumes)
+        self._evaluations = None
+        self._unit = None
+    #end def
+    
+    def scaled(self, n):
+        '''The subtree of n such volumes'''
+        if n == 1: return self
+        return interned.get(('pcs', self, n), lambda: self._copy(n))
+    
+    def _copy(self, n):
+        v = self.__class__.__new__(self.__class__)
+        v.__setstate__(self.__getstate__())
+        v.set_pcs(n)
+        return v
+    
+    def forget(self):
+        '''Drops the evaluations kept by the subtree, so they are computed again'''
+        self._evaluations = None
+        self._unit = None
+        for sv in self._subvolumes: sv.forget()
+    
+    def __getstate__(self):
+        state = dict((a, getattr(self, a)) for a in volume.__slots__
+                     if a not in ('_evaluations', '_unit'))
+        state.update(getattr(self, '__dict__', ()))
+        return state
+    
+    def __setstate__(self, state):
+        for a, x in state.items(): setattr(self, a, x)
+        self._evaluations = None
+        self._unit = None
+    
+    @property
+    def unit(self):
+        '''
+        The evaluation at scale=1, length=1, i.e. the coefficients of all metrics;
+        it is computed once per node.
+        '''
+        if self._unit is None:
+            self._unit = evaluation(self, 1, 1, tuple(sv.unit for sv in self._subvolumes))
+        return self._unit
     #end def
         
-    #volume and surface area
+    #volume and surface area;
+    #own volume, full_V, S and the surface metrics are computed directly,
+    #the rest are given by the coefficients of the unit evaluation
     def V(self, scale=1, length=1):
         vol = self.full_V(scale, length) - sum(sv.full_V(scale, length) for sv in self._subvolumes)
-        assert vol>=0, \
+        assert np.all(vol>=0), \
         ("Combined volume of sub-volumes is greater than the volume of '%s'" % self.name)
         return vol
     #end def
@@ -93,67 +368,90 @@ class volume:
         return self._surface.S(scale, length)
     
     def full_S(self, scale=1, length=1):
-        return (self.S(scale, length) +
-                sum(sv.full_S(scale, length) for sv in self._subvolumes))
+        return self.unit.full_S*scale**2*length
     
     #cost
     def V_cost(self, scale=1, length=1):
-        return self.V(scale, length)*self._cost
+        return self.unit.V_cost*scale**3*length
     
     def full_V_cost(self, scale=1, length=1):
-        return (self.V_cost(scale, length) + 
-                sum(sv.full_V_cost(scale, length) for sv in self._subvolumes))
+        return self.unit.full_V_cost*scale**3*length
 
     def S_cost(self, scale=1, length=1):
         if self._surface is None: return 0 
         return self._surface.cost(scale, length)
     
     def full_S_cost(self, scale=1, length=1):
-        return (self.S_cost(scale, length) + 
-                sum(sv.full_S_cost(scale, length) for sv in self._subvolumes))
+        return self.unit.full_S_cost*scale**2*length
         
     def full_cost(self, scale=1, length=1): 
-        return self.full_V_cost(scale, length) + self.full_S_cost(scale, length)
+        u = self.unit
+        return (u.full_V_cost*scale + u.full_S_cost)*scale**2*length
 
     #mass
     def V_mass(self, scale=1, length=1):
-        return self.V(scale, length)*self.d;
+        return self.unit.V_mass*scale**3*length
     
     def full_V_mass(self, scale=1, length=1):
-        return (self.V_mass(scale, length) + 
-                sum(sv.full_V_mass(scale, length) for sv in self._subvolumes))
+        return self.unit.full_V_mass*scale**3*length
         
     def S_mass(self, scale=1, length=1):
         if self._surface is None: return 0 
         return self._surface.mass(scale, length)
     
     def full_S_mass(self, scale=1, length=1):
-        return (self.S_mass(scale, length) + 
-                sum(sv.full_S_mass(scale, length) for sv in self._subvolumes))
+        return self.unit.full_S_mass*scale**2*length
         
     def full_mass(self, scale=1, length=1): 
-        return self.full_V_mass(scale, length) + self.full_S_mass(scale, length)
+        u = self.unit
+        return (u.full_V_mass*scale + u.full_S_mass)*scale**2*length
+    
+    #all metrics of the subtree, scaled from the unit evaluation;
+    #evaluations at scalar scale and length are kept and shared by all parents,
+    #up to max_evaluations of them, so that a long running process does not grow
+    max_evaluations = 64
+    def evaluate(self, scale=1, length=1):
+        key = (scale, length)
+        try: hash(key)
+        except TypeError: return self.unit.at(scale, length)
+        ev = self._evaluations.get(key) if self._evaluations is not None else None
+        if ev is None:
+            ev = self.unit.at(scale, length)
+            if self._evaluations is None: self._evaluations = {}
+            elif len(self._evaluations) >= self.max_evaluations: self._evaluations.clear()
+            self._evaluations[key] = ev
+        return ev
+    #end def
     
     #representation
-    def __str__(self):
+    def _lines(self, ev):
+        '''Generates the report lines of this volume and its subvolumes'''
         simple = self._surface is None and not self._subvolumes
-        s  = ''
-        s += '%s: %sm^3, %s%st, %sCr\n' % (self.name, self.full_V(),
-                                           '%st/m^3 ' % self.d if simple else '', 
-                                           self.full_mass(), self.full_cost())
+        yield '%s: %sm^3, %s%st, %sCr' % (self.name, ev.full_V,
+                                         '%st/m^3 ' % self.d if simple else '', 
+                                         ev.full_mass, ev.full_cost)
         if not simple:
             if self._surface is not None: 
-                s += '   surface: %s\n' % self._surface
-            if self.V_mass() > 0 or self.V_cost() > 0: 
-                s += '   content: %sm^3, %st/m^3, %st, %sCr\n' % (self.V(), self.d, 
-                                                                  self.V_mass(), self.V_cost())
-            if len(self._subvolumes) > 0:
-                s += '   '+''.join(str(sv).replace('\n', '\n   ') for sv in self._subvolumes)
-                s = s[:-3]
-        return s
+                yield '   surface: %s' % self._surface
+            if ev.V_mass > 0 or ev.V_cost > 0: 
+                yield '   content: %sm^3, %st/m^3, %st, %sCr' % (ev.V, self.d, 
+                                                                ev.V_mass, ev.V_cost)
+            for sev in ev.subvolumes:
+                for line in sev.volume._lines(sev): yield '   '+line
+    #end def
+    
+    def lines(self, scale=1, length=1): 
+        return self._lines(self.evaluate(scale, length))
+    
+    def __str__(self): return ''.join(line+'\n' for line in self.lines())
+    
+    def compile(self): return flat_tree(self)
 #end class
 
 
+sweep_table = collections.namedtuple('sweep_table', 'scale length mass cost entry_cost')
+
+
 class part(collections.Iterable):
     _asymptote_slope     = 1.5
     _asymptote_intercept = 1e5
@@ -166,17 +464,18 @@ class part(collections.Iterable):
         self._add_cost  = add_cost
         self._res_cost  = res_cost
         self._size      = size
-        self._spec_mass = np.array([self.V_mass(), self.S_mass(), 0, self._add_mass])
+        evals = self.evaluate()
+        self._spec_mass = np.array([sum(ev.full_V_mass for ev in evals), 
+                                    sum(ev.full_S_mass for ev in evals), 
+                                    0, self._add_mass])
         self._init_mass = sum(self._spec_mass)
         self._weights   = self._spec_mass/self._init_mass
-        self._spec_cost = np.array([sum(v.full_V_cost() for v in self._volumes), 
-                                    sum(v.full_S_cost() for v in self._volumes), 
+        self._spec_cost = np.array([sum(ev.full_V_cost for ev in evals), 
+                                    sum(ev.full_S_cost for ev in evals), 
                                     0, self._add_cost])
         self._cost      = sum(self._spec_cost)
         self._cost_weights = self._spec_cost/self._cost
         self._cost     += res_cost
-        print(self)
-        print
     #end def
     
     def __iter__(self): return iter(self._volumes)
@@ -186,8 +485,11 @@ class part(collections.Iterable):
         return [volume(self.volume(), self.name, V=self._volumes)]
     #end def
     
+    #scale and length may be numbers or arrays of any broadcastable shapes,
+    #e.g. scale[:,None] and length[None,:] give a scale x length grid
     def mass(self, scale=1, length=1):
-        scale = scale/self._size
+        scale  = np.asarray(scale, dtype=float)/self._size
+        length = np.asarray(length, dtype=float)
         w = self._spec_mass
         m = ((w[0]*scale + w[1])*scale + w[2])*scale*length
         if len(w) > 3: m += w[3]
@@ -195,7 +497,8 @@ class part(collections.Iterable):
     #end def
     
     def cost(self, scale=1, length=1):
-        scale = scale/self._size
+        scale  = np.asarray(scale, dtype=float)/self._size
+        length = np.asarray(length, dtype=float)
         w = self._spec_cost
         c = ((w[0]*scale + w[1])*scale + w[2])*scale*length
         if len(w) > 3: c += w[3]
@@ -208,44 +511,86 @@ class part(collections.Iterable):
         return c*cls._asymptote_slope + (1-cls._exponent_base**(-10*c/cls._asymptote_intercept))*cls._asymptote_intercept
     #end def
     
+    def sweep(self, scales, lengths=1):
+        '''
+        Computes mass, cost and entry cost of the part on the scales x lengths grid.
+        All fields of the returned sweep_table have the shape (len(scales), len(lengths)).
+        '''
+        scales  = np.atleast_1d(np.asarray(scales, dtype=float))
+        lengths = np.atleast_1d(np.asarray(lengths, dtype=float))
+        s, l = np.meshgrid(scales, lengths, indexing='ij')
+        cost = self.cost(s, l)
+        return sweep_table(s, l, self.mass(s, l), cost, 
+                           np.ceil(self.entry_cost(cost-self._res_cost)))
+    #end def
+    
     def true_mass(self, scale=1, length=1):
-        return self.V_mass(scale, length)+self.S_mass(scale, length)+self._add_mass
+        return sum(ev.full_mass for ev in self.evaluate(scale, length))+self._add_mass
     #end def
     
+    def evaluate(self, scale=1, length=1):
+        return [v.evaluate(scale, length) for v in self._volumes]
+    
+    def compile(self): return flat_tree(self)
+    
     def volume(self, scale=1, length=1):
         return sum(v.full_V(scale, length) for v in self._volumes)
     
     def surface(self, scale=1, length=1):
-        return sum(v.full_S(scale, length) for v in self._volumes)
+        return sum(ev.full_S for ev in self.evaluate(scale, length))
     
     def V_mass(self, scale=1, length=1):
-        return sum(v.full_V_mass(scale, length) for v in self._volumes)
+        return sum(ev.full_V_mass for ev in self.evaluate(scale, length))
     
     def S_mass(self, scale=1, length=1):
-        return sum(v.full_S_mass(scale, length) for v in self._volumes)
+        return sum(ev.full_S_mass for ev in self.evaluate(scale, length))
     #end def
 
-    def __str__(self):
-        s  = '//'+hr(self.name, '=')
-        s += '//'+'\n//'.join(str(v).replace('\n', '\n//') for v in self._volumes)[:-2]
-        s += '//'+hr()
-        s += '//Total volume:    %.3f m^3, %.6f t\n' % (self.volume(), self.V_mass())
-        s += '//Total surface:   %.3f m^2, %.6f t\n' % (self.surface(), self.S_mass())
-        s += '//Additional mass: %.6f t\n' % self._add_mass
-        s += '//Additional cost: %.3f Cr\n' % self._add_cost
-        s += '//Resources  cost: %.3f Cr\n' % self._res_cost
-        s += 'entryCost = %d\n' % np.ceil(self.entry_cost(self._cost-self._res_cost))
-        s += 'cost = %d\n' % np.ceil(self._cost)
-        s += 'mass = %.6f\n' % self._init_mass
-        s += 'specificMass = %s //weights: [ %s ]\n' % (', '.join(str(m) for m in self._spec_mass), 
-                                                        ', '.join(str(w) for w in self._weights))
-        s += 'specificCost = %s //weights: [ %s ]\n' % (', '.join(str(m) for m in self._spec_cost), 
-                                                        ', '.join(str(w) for w in self._cost_weights))
-        return s
+    def lines(self):
+        '''Generates the report lines of the part one by one'''
+        evals = self.evaluate()
+        yield '//'+hr(self.name, '=').rstrip('\n')
+        for i, ev in enumerate(evals):
+            if i > 0: yield '//'
+            for line in ev.volume._lines(ev): yield '//'+line
+        yield '//'+hr().rstrip('\n')
+        yield '//Total volume:    %.3f m^3, %.6f t' % (sum(ev.full_V for ev in evals), 
+                                                    sum(ev.full_V_mass for ev in evals))
+        yield '//Total surface:   %.3f m^2, %.6f t' % (sum(ev.full_S for ev in evals), 
+                                                    sum(ev.full_S_mass for ev in evals))
+        yield '//Additional mass: %.6f t' % self._add_mass
+        yield '//Additional cost: %.3f Cr' % self._add_cost
+        yield '//Resources  cost: %.3f Cr' % self._res_cost
+        m = self.metrics()
+        yield 'entryCost = %d' % m['entryCost']
+        yield 'cost = %d' % m['cost']
+        yield 'mass = %.6f' % m['mass']
+        yield 'specificMass = %s //weights: [ %s ]' % (', '.join(str(x) for x in m['specificMass']), 
+                                                       ', '.join(str(w) for w in self._weights))
+        yield 'specificCost = %s //weights: [ %s ]' % (', '.join(str(x) for x in m['specificCost']), 
+                                                       ', '.join(str(w) for w in self._cost_weights))
     #end def
     
+    def metrics(self):
+        '''The values of the part's cfg at the default size, keyed by the cfg names'''
+        return collections.OrderedDict([
+            ('entryCost',    int(np.ceil(self.entry_cost(self._cost-self._res_cost)))),
+            ('cost',         int(np.ceil(self._cost))),
+            ('mass',         self._init_mass),
+            ('specificMass', list(self._spec_mass)),
+            ('specificCost', list(self._spec_cost)),
+            ])
+    #end def
+    
+    def write(self, out=None):
+        '''Writes the report line by line to the out stream (sys.stdout by default)'''
+        write_lines(self.lines(), out)
+    
+    def __str__(self): return ''.join(line+'\n' for line in self.lines())
+    
     def print_masses(self, _from=0.5, _to=4.0, step=0.5):
-        for s in np.arange(_from, _to+step/2.0, step):
-            print s, self.mass(s)
-        print ''
+        scales = np.arange(_from, _to+step/2.0, step)
+        for s, m in zip(scales, self.mass(scales)):
+            print('%s %s' % (s, m))
+        print('')
 #end class
\ No newline at end of file
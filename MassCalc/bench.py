@@ -0,0 +1,378 @@
+'''
+Benchmarks of MassCalc.
+
+Times the construction of the catalog, its evaluation, the sweeps, the
+reports and the synthetic trees of depth 1-10 and fan-out 1-1000, and
+measures the memory per node. Every run is appended to a JSON history;
+the results are compared with the baseline stored there and those worse
+than the baseline by more than the threshold are flagged:
+
+    python bench.py --set-baseline      #before a change
+    python bench.py                     #after it; exits with 1 on slowdowns
+'''
+import os
+import gc
+import json
+import time
+import fnmatch
+import platform
+import subprocess
+from timeit import default_timer
+from collections import OrderedDict
+
+import numpy as np
+
+from base_classes import volume, surface, material, interned, format_data
+from flat_tree import flat_tree
+from catalog import parts
+from parallel import part_lines
+
+
+def synthetic_tree(depth, fanout, seed=0, mat=None):
+    '''
+    A tree of the given depth (1 is a single node) where every inner node
+    has fanout subvolumes and every node has a surface. The parameters
+    depend on the seed and on the position of the node, so the nodes
+    of different trees are not shared by the interning.
+    '''
+    if mat is None: mat = material(2.7, 8.0, 'bench')
+    counter = [0]
+    def node(level):
+        counter[0] += 1
+        k = seed+counter[0]*1e-9
+        subvolumes = [node(level+1) for _i in range(fanout)] if level < depth else []
+        V = sum(sv._V for sv in subvolumes)*1.1+1+k
+        return volume(V, 'node', C=1+k, D=0.01+k,
+                      S=surface(V**(2/3.0), 0.004, mat),
+                      V=subvolumes)
+    return node(1)
+#end def
+
+
+def tree_size(depth, fanout):
+    return sum(fanout**i for i in range(depth))
+
+
+def resident_memory():
+    '''Resident memory of the process in bytes'''
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+#end def
+
+
+def node_memory(nodes=100000, depth=3, fanout=10):
+    '''
+    Builds synthetic trees with the given total number of nodes and returns
+    (number of nodes, bytes per node built, bytes per node evaluated):
+    the increase of the resident memory per node (a volume with its surface,
+    including the interning table) and the further increase once the unit
+    evaluations of the nodes are computed.
+    '''
+    interned.clear()
+    gc.collect()
+    before = resident_memory()
+    trees = [synthetic_tree(depth, fanout, seed)
+             for seed in range(max(1, nodes//tree_size(depth, fanout)))]
+    gc.collect()
+    built = resident_memory()
+    for t in trees: t.unit
+    gc.collect()
+    evaluated = resident_memory()
+    n = float(len(trees)*tree_size(depth, fanout))
+    del trees
+    interned.clear()
+    return int(n), (built-before)/n, (evaluated-built)/n
+#end def
+
+
+#the timed benchmarks; each one prepares its data and returns the function to time
+
+sweep_scales  = np.arange(0.5, 4.01, 0.05)
+sweep_lengths = np.arange(0.5, 4.01, 0.5)
+
+
+def forget_evaluations(built):
+    '''Drops the evaluations kept by the nodes of the parts, so they are computed again'''
+    for p in built:
+        for v in p: v.forget()
+#end def
+
+
+def bench_construction():
+    interned.clear()
+    parts.forget()
+    def run():
+        for _p in parts.build(): pass
+    return run
+#end def
+
+
+def bench_evaluation():
+    built = list(parts.build())
+    forget_evaluations(built)
+    def run():
+        for p in built: p.evaluate(p._size)
+    return run
+#end def
+
+
+def bench_compile():
+    built = list(parts.build())
+    def run():
+        for p in built: p.compile()
+    return run
+#end def
+
+
+def bench_sweep():
+    built = list(parts.build())
+    def run():
+        for p in built: p.sweep(sweep_scales, sweep_lengths)
+    return run
+#end def
+
+
+def bench_breakdown():
+    built = [(p, p.compile()) for p in parts.build()]
+    s, l = np.meshgrid(sweep_scales, sweep_lengths, indexing='ij')
+    def run():
+        for p, t in built: t.evaluate(s.ravel()/p._size, l.ravel())
+    return run
+#end def
+
+
+def bench_report():
+    built = list(parts.build())
+    forget_evaluations(built)
+    def run():
+        for p in built: part_lines(p)
+    return run
+#end def
+
+
+def bench_report_sweep():
+    built = list(parts.build())
+    forget_evaluations(built)
+    def run():
+        for p in built: part_lines(p, sweep_scales, sweep_lengths, True)
+    return run
+#end def
+
+
+def bench_tree_build(depth, fanout):
+    interned.clear()
+    def run():
+        synthetic_tree(depth, fanout).unit
+    return run
+#end def
+
+
+def bench_tree_flat(depth, fanout):
+    interned.clear()
+    tree = synthetic_tree(depth, fanout)
+    def run():
+        flat_tree(tree).evaluate(sweep_scales, 1.0)
+    return run
+#end def
+
+
+tree_depths  = (1, 2, 3, 5, 10)
+tree_fanouts = (1, 2, 10, 100, 1000)
+
+
+def benchmarks(max_nodes=100000):
+    '''
+    OrderedDict {name: factory} of the timed benchmarks.
+    The synthetic trees with more than max_nodes nodes are skipped.
+    '''
+    b = OrderedDict()
+    b['construction'] = bench_construction
+    b['evaluation']   = bench_evaluation
+    b['compile']      = bench_compile
+    b['sweep']        = bench_sweep
+    b['breakdown']    = bench_breakdown
+    b['report']       = bench_report
+    b['report_sweep'] = bench_report_sweep
+    for depth in tree_depths:
+        for fanout in tree_fanouts:
+            #a single node has no subvolumes whatever the fan-out
+            if depth == 1 and fanout > 1 or tree_size(depth, fanout) > max_nodes: continue
+            name = 'tree_d%d_f%d' % (depth, fanout)
+            b[name+'.build'] = lambda d=depth, f=fanout: bench_tree_build(d, f)
+            b[name+'.flat']  = lambda d=depth, f=fanout: bench_tree_flat(d, f)
+    return b
+#end def
+
+
+def measure(factory, repeat=5, min_time=0.1):
+    '''
+    Time per run of the benchmark: the least of repeat measurements, each
+    averaging as many runs as take at least min_time (as timeit.autorange
+    does), so the short benchmarks are not dominated by the timer and
+    the scheduler. Every run is prepared anew and only the run is timed,
+    with the garbage collection disabled as in timeit.
+    '''
+    best = None
+    for _i in range(repeat):
+        total, runs = 0.0, 0
+        gc.collect()
+        gc.disable()
+        try:
+            while total < min_time or not runs:
+                run = factory()
+                start = default_timer()
+                run()
+                total += default_timer()-start
+                runs += 1
+        finally: gc.enable()
+        t = total/runs
+        if best is None or t < best: best = t
+    return best
+#end def
+
+
+#the history of the runs
+
+default_history = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.bench-history.json')
+
+
+def git_commit():
+    '''The commit of the working tree (with + if it is modified), if known'''
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        with open(os.devnull, 'w') as null:
+            commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                             cwd=cwd, stderr=null).decode('utf8').strip()
+            dirty  = subprocess.call(['git', 'diff', '--quiet', 'HEAD', '--', '.'],
+                                     cwd=cwd, stdout=null, stderr=null)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit+('+' if dirty else '')
+#end def
+
+
+def load_history(filename):
+    if not os.path.isfile(filename): return OrderedDict([('baseline', None), ('runs', [])])
+    with open(filename) as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+#end def
+
+
+def save_history(history, filename):
+    tmp = filename+'.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(history, f, indent=1, separators=(',', ': '))
+    os.rename(tmp, filename)
+#end def
+
+
+def compare(results, baseline, threshold=0.2, floor=0.001):
+    '''
+    Yields (name, result, baseline result or None, relative change or None, flagged)
+    for the results of a run; a result is flagged if it is worse (greater)
+    than that of the baseline by more than the threshold. Times shorter than
+    floor seconds in both runs are too noisy to be flagged.
+    '''
+    base = baseline['results'] if baseline else {}
+    for name, r in results.items():
+        b = base.get(name)
+        if not b or b['unit'] != r['unit'] or not b['value']:
+            yield name, r, None, None, False
+            continue
+        change = r['value']/b['value']-1
+        noisy  = r['unit'] == 's' and max(r['value'], b['value']) < floor
+        yield name, r, b, change, change > threshold and not noisy
+#end def
+
+
+def _value(r):
+    if r['unit'] == 's': return '%.6f s' % r['value']
+    return '%.0f %s' % (r['value'], r['unit'])
+#end def
+
+
+def report_lines(run, baseline, threshold=0.2, floor=0.001):
+    '''The table of the results of the run compared with the baseline'''
+    rows = list(compare(run['results'], baseline, threshold, floor))
+    yield '//=== %s, commit %s, Python %s; baseline: %s ===' % \
+        (run['date'], run['commit'] or '-', run['python'],
+         '%s, commit %s' % (baseline['date'], baseline['commit'] or '-') if baseline else '-')
+    if not rows: return
+    yield '//benchmark : result : baseline : change'
+    table = format_data([row[0] for row in rows],
+                        [[_value(row[1]) for row in rows],
+                         [_value(row[2]) if row[2] else '-' for row in rows],
+                         ['%+.1f%%' % (row[3]*100) if row[3] is not None else '-'
+                          for row in rows]])
+    for row, line in zip(rows, table.splitlines()):
+        yield '//'+line+('<- slower' if row[4] else '')
+#end def
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+    from base_classes import write_lines
+    parser = argparse.ArgumentParser(description='Benchmarks of MassCalc; every run is recorded '
+                                     'in the history and compared with its baseline')
+    parser.add_argument('-b', '--bench', action='append', metavar='NAME',
+                        help='run only the benchmarks matching NAME (glob); may be repeated')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='list the benchmarks and exit')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='measurements of each benchmark; the least time counts (default: %(default)s)')
+    parser.add_argument('--min-time', type=float, default=0.1, metavar='SECONDS',
+                        help='each measurement averages as many runs as take this long '
+                        '(default: %(default)s)')
+    parser.add_argument('--max-nodes', type=int, default=100000,
+                        help='skip the synthetic trees with more nodes (default: %(default)s)')
+    parser.add_argument('-n', '--nodes', type=int, default=100000,
+                        help='number of nodes of the memory benchmark (default: %(default)s)')
+    parser.add_argument('--history', metavar='FILE', default=default_history,
+                        help='JSON history of the runs and the baseline (default: %(default)s)')
+    parser.add_argument('--no-record', action='store_true',
+                        help='do not add the run to the history')
+    parser.add_argument('--set-baseline', action='store_true',
+                        help='make this run the baseline of the following ones')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help='relative slowdown (or growth of memory) that is flagged '
+                        '(default: %(default)s)')
+    parser.add_argument('--floor', type=float, default=0.001, metavar='SECONDS',
+                        help='times shorter than this are not flagged (default: %(default)s)')
+    args = parser.parse_args()
+    benches = benchmarks(args.max_nodes)
+    names = list(benches)+['memory.built', 'memory.evaluated']
+    if args.bench:
+        names = [n for n in names if any(fnmatch.fnmatchcase(n, p) for p in args.bench)]
+        if not names: parser.error('no benchmark matches %s' % ', '.join(args.bench))
+    if args.list:
+        for name in names: print(name)
+        sys.exit()
+    results = OrderedDict()
+    #the memory is measured first, before the other benchmarks grow the heap
+    if any(n.startswith('memory.') for n in names):
+        _n, built, evaluated = node_memory(args.nodes)
+        for name, value in (('memory.built', built), ('memory.evaluated', evaluated)):
+            if name in names: results[name] = OrderedDict([('value', value), ('unit', 'B/node')])
+    for name in names:
+        if name in benches:
+            results[name] = OrderedDict([('value', measure(benches[name], args.repeat, args.min_time)),
+                                         ('unit', 's')])
+    run = OrderedDict([('date',    time.strftime('%Y-%m-%d %H:%M:%S')),
+                       ('commit',  git_commit()),
+                       ('python',  platform.python_version()),
+                       ('numpy',   np.__version__),
+                       ('repeat',  args.repeat),
+                       ('min_time', args.min_time),
+                       ('results', results)])
+    history  = load_history(args.history)
+    baseline = history['baseline']
+    write_lines(report_lines(run, baseline, args.threshold, args.floor))
+    slower = [row[0] for row in compare(results, baseline, args.threshold, args.floor) if row[4]]
+    if args.set_baseline: history['baseline'] = run
+    if not args.no_record or args.set_baseline:
+        history['runs'].append(run)
+        save_history(history, args.history)
+    if slower and not args.set_baseline:
+        sys.stderr.write('slower than the baseline: %s\n' % ', '.join(slower))
+        sys.exit(1)
@@ -0,0 +1,571 @@
+from base_classes import surface, volume, part
+from components import *
+from registry import part_registry
+
+parts = part_registry()
+
+
+
+@parts.register('InlineHangar')
+def inline1(name):
+    return part(name,
+                [volume(9.4, 'hull', C=1, D=0.02, 
+                        S=surface(66.444, 0.004, Al_Li),
+                        V=[volume(3.93, 'machinery', C=850, M=0.430)]),
+                 volume(0.659*2, 'doors', C=1, D=0.02,
+                        S=surface(9.32*2, 0.003, Al_Li)),
+                 ],
+                size = 2,
+                add_mass=0,
+                add_cost=200) #docking port
+
+@parts.register('InlineHangar2')
+def inline2(name):
+    return part(name,
+                [volume(98.08, 'hull', C=1, D=0.02,
+                        S=surface(268.11, 0.005, Al_Li),
+                        V=[volume(53.66, 'top compartment', C=20, D=0.05,
+                                  V=[volume(7.34, 'cabins', C=4000, M=0.35*3, N=2,
+                                            S=surface(25.19, 0.003, Al_Li)),
+                                     volume(15.5, 'corridor', C=2, D=0.0012,
+                                            S=surface(41.33, 0.003, Al_Li)),
+                                     volume(9.17, 'machinery', C=1900, M=1.2)])]),
+                 volume(4.05, 'doors', C=1, D=0.02, N=2,
+                        S=surface(35.94, 0.004, Al_Li)),
+                 ], 
+                size = 2,
+                add_mass=0,
+                add_cost=280) #docking port
+
+@parts.register('RadialHangar')
+def radial_hangar(name):
+    return part(name,
+                [volume(19.36, 'hull', C=1, D=0.02,
+                        S=surface(224.795, 0.004, Al_Li),
+                        V=[volume(10.38, 'machinery', C=1100, M=0.9)]),
+                 volume(4.58, 'base', C=1, D=0.02,
+                        S=surface(26.47, 0.004, Al_Li)),
+                 volume(0.55, 'doors', C=1, D=0.02, N=2,
+                        S=surface(16.08, 0.004, Al_Li)),
+                 ], 
+                size = 2,
+                add_mass=0,
+                add_cost=0)
+
+@parts.register('Spaceport')
+def spaceport(name):
+    return part(name,
+                [volume(366.046, 'hull', C=2, D=0.01,
+                        S=surface(960.55, 0.007, composits),
+                        V=[volume(46.92, 'machinery room', C=3500, M=4,
+                                  V=[battery(E=20000),
+                                     reaction_wheel(T=140),
+                                     generator(E=6.75),
+                                     volume(2, 'monopropellent tank', 
+                                            S=surface(11.04, 0.003, Al_Li))]),
+                         volume(112.64, 'side-space', C=20, D=0.05, N=2,
+                                V=[volume(2.88, 'cabins', C=2000, M=0.35, N=5,
+                                          S=surface(12.8, 0.01, compositsL)),
+                                   volume(27.25, 'corridors', C=1, D=0.0012,
+                                          S=surface(93.66, 0.01, compositsL)),
+                                   volume(8.79, 'doors machinery', C=800, M=0.35,
+                                          S=surface(26.44, 0.01, compositsL))]),
+                         volume(1.5*2+8.7, 'corridors', C=1, D=0.0012)
+                         ]),
+                 volume(1.64, 'doors', C=2, D=0.01, N=2,
+                        S=surface(28.94, 0.007, composits)),
+                         ],
+                size = 3,
+                add_mass=4+0.08, #cockpit, probe core
+                add_cost=980 + 300 + 4000 + 3400,  #DockPort + Light + Cockpit + probe core
+                res_cost=2400) #Monoprop
+
+@parts.register('RoverLander')
+def lander(name):
+    return part(name, 
+                [volume(9.536, 'hull', C=2, D=0.01,
+                        S=surface(92.1, 0.004, Al_Li),
+                        V=[volume(3.498, 'machinery', C=920, M=0.30),
+                           volume(2.225, 'base', C=40, D=0.3,
+                                  V=[reaction_wheel(T=25)])]),
+                 volume(0.58+0.0138*2, 'doors', C=1, D=0.02, N=2,
+                        S=surface(13.9, 0.003, Al_Li),
+                        V=[volume(0.0138, 'ramp side walls', N=2, material=Al_Li),]),
+                 volume(0.47+0.016*2, 'legs', C=1, D=0.02, N=2,
+                        S=surface(13.425, 0.003, Al_Li),
+                        V=[volume(0.016, 'ribs', C=1, D=0.02,
+                                  S=surface(1.13, 0.003, Al_Li))]),
+                 volume(0.045, 'clamp', C=600, D=0.98),
+                 battery(V=0.444*2, E=2000),
+                 volume(0.186, 'fuel tanks', N=6,
+                        S=surface(2.39, 0.002, Al_Li)),
+                 volume(0.0225, 'hydraulic cylinders', N=4,
+                        S=surface(0.721, 0.008, aluminium),
+                        V=[volume(0.012, 'inner hydraulic cylinders', C=3, D=0.8, #hydraulic oil is ~0.8
+                                S=surface(0.543, 0.006, aluminium))]),
+                 volume(0.002, 'hinges', N=8, material=aluminium),
+                 ],
+                add_mass=0.04, #probe core
+                add_cost=200 + 1480, #Light + probe core
+                res_cost=324 + 89.1 + 240, #LF+Ox+MP
+                size=2)
+
+#ground hangars
+@parts.register('SmallHangar')
+def small(name):
+    return part(name,
+                [volume(9.62, 'hull', C=1, D=0.02, 
+                        S=surface(149.24, 0.004, aluminium),
+                        V=[volume(4.7, 'machinery', C=550, M=0.530,
+                                  V=[battery(E=2000)])]),
+                 solar_panel(2.413),#4.825),
+                 volume(0.182, 'doors', C=1, D=0.02,
+                        S=surface(15.17, 0.004, aluminium)),
+                 volume(0.18,'clamp', C=300, D=0.78)
+                         ], 
+                add_mass=0.04, #probe core
+                add_cost=100 + 300) #Light + probe core
+
+@parts.register('BigHangar')
+def big(name):
+    return part(name,
+                [volume(377.84, 'hull', C=2, D=0.01,
+                        S=surface(1709.32, 0.01, composits),
+                        V=[volume(218.99, 'rear-compartment', C=150, D=0.02,
+                                  V=[volume(12.126, 'cabins', C=3000, M=1, N=6,
+                                            S=surface(31.88, 0.01, composits)),
+                                     volume(11.12, 'corridors', C=150, D=0.0012, N=3,
+                                            S=surface(40.6, 0.01, composits)),
+                                     volume(67.57, 'machinery', C=4260, M=5.4, 
+                                            V=[battery(V=20, E=40000),
+                                               generator(E=10)])])]),
+                 volume(6.07, 'doors', C=2, D=0.01,
+                        S=surface(132.66, 0.01, composits)),
+                 volume(4.34, 'clamp', C=300, D=0.78),
+                         ],
+                add_mass=0.04, #probe core
+                add_cost=300 + 300) #Light + probe core
+
+@parts.register('SmallVTOLHangar')
+def small_vtol(name):
+    return part(name,
+                [volume(72.55, 'hull', C=1, D=0.02,
+                        S=surface(660.26, 0.004, aluminium),
+                        V=[volume(25.56, 'machinery', C=1550, M=3.0,
+                                  V=[battery(E=4000)])]),
+                 ],
+                add_mass=0.04,  # probe core
+                add_cost=100 + 300)  # Light + probe core
+
+#inflatables
+@parts.register('InflatableHangar1')
+def inflatable1(name):
+    return part(name,
+                [volume(0.444, 'hull', C=1, D=0.02,
+                        S=surface(11.95, 0.01, Al_Li)),
+                 volume(0.019, 'doors', C=1, D=0.02, N=4,
+                        S=surface(1.32, 0.005, Al_Li)),
+                 battery(V=0.02245*2, E=200),
+                 volume(0.00002, 'hinges', N=8, material=aluminium),
+                 volume(6.96, 'hangar', C=1, D=0.0012, 
+                        S=surface(136.24, 0.001, lavsan)),
+                 volume(0.67, 'hangar-door', C=1, D=0.0012,
+                        S=surface(15.06, 0.001, lavsan)),
+                         ], 
+                add_mass=0.04, #probe core
+                add_cost=300) #probe core
+
+@parts.register('InflatableHangar2')
+def inflatable2(name):
+    return part(name,
+                [volume(0.444, 'hull', C=1, D=0.02,
+                        S=surface(11.95, 0.01, composits)),
+                 volume(0.019*4, 'doors', C=1, D=0.02,
+                        S=surface(1.32*4, 0.005, composits)),
+                 battery(V=0.02245, E=100),
+                 generator(V=0.00595),
+                 volume(0.067, 'compressor-motor', C=1200, M=0.1),
+                 volume(0.0063, 'compressor-cylinders', C=15000, D=0.81, N=2),
+                 volume(0.00054, 'compressor-fixers', N=2,
+                        S=surface(0.087, 0.003, Al_Li)),
+                 volume(0.00002, 'hinges', N=8, material=aluminium),
+                 volume(6.96, 'hangar', C=1, D=0.0012,
+                        S=surface(136.24, 0.001, lavsan)),
+                 volume(0.67, 'hangar-door', C=1, D=0.0012,
+                        S=surface(15.06, 0.001, lavsan)),
+                         ], 
+                add_mass=0.04, #probe core
+                add_cost=300) #probe core
+
+@parts.register('InflatableSpaceHangar')
+def space_inflatable(name):
+    return part(name,
+                [volume(0.14, 'adapter', C=1, D=0.02,
+                        S=surface(5.87, 0.01, Al_Li)),
+                 volume(2.02, 'back-wall', C=1200, D=0.02,
+                        S=surface(21.89, 0.01, Al_Li)),
+                 volume(0.0041, 'struts', N=4, material=steel),
+                 volume(0.0087, 'cables', N=4, material=steel),
+                 volume(0.059, 'motors', N=4, C=200, D=0.9,
+                        S=surface(0.89, 0.01, Al_Li)),
+                 volume(0.363, 'gate-frame', C=1, D=0.02,
+                        S=surface(8.43, 0.01, Al_Li)),
+                 volume(0.367+0.339, 'doors', C=1, D=0.02,
+                        S=surface(10.57+9.58, 0.005, Al_Li)),
+                 volume(0.003, 'hinges', N=4, material=aluminium),
+                 volume(4.878, 'hangar', C=1, D=0.0012,
+                        S=surface(158.82, 0.001, lavsan)),
+                 ])
+
+@parts.register('Mk3Hangar')
+def mk3_hangar(name):
+    return part(name,
+                [volume(130.43, 'hull', C=100, D=0.02,
+                        S=surface(549.29, 0.002, Al_Li),
+                        V=[volume(5, 'machinery', C=1200, M=0.7),
+                           generator(E=1.5),
+                           battery(E=5000),
+                           reaction_wheel(T=120),
+                           volume(0.011, 'hydraulics', N=2, 
+                                  material=aluminium),
+                           volume(100, 'tanks', C=20)]),
+                 volume(3.96, 'doors', C=100, D=0.02,
+                        S=surface(70.86, 0.002, Al_Li)),
+                 ], 
+                add_mass=0,
+                add_cost=0)
+
+@parts.register('FairingsOcto')
+def fairings_octo(name):
+    return part(name,
+                [volume(1.11, 'hull', C=1, D=0.02,
+                        S=surface(35.398 , 0.001, Al_Li),
+                        V=[volume(0.427, 'base', C=1, D=0.02,
+                                  S=surface(4.543, 0.002, Al_Li),
+                                  V=[
+                                     reaction_wheel(T=10),
+                                     battery(E=50),
+                                     volume(0.1, 'jettison-charge', C=400, M=0.05)])]),
+                 volume(0.149, 'petals', N=2,
+                        S=surface(6.096, 0.002, composits)),
+                 ], 
+                add_mass=0.04,
+                add_cost=450)
+
+@parts.register('BoxFairings')
+def box_fairings(name):
+    return part(name,
+                [volume(1.589, 'base', C=1, D=0.02,
+                        S=surface(18.04, 0.002, Al_Li),
+                        V=[
+                           battery(E=50),
+                           volume(0.1, 'jettison-charge', C=400, M=0.05)]),
+                 volume(1.24, 'cap-left', C=1, D=0.02,
+                        S=surface(12.98, 0.002, Al_Li)),
+                 volume(0.88, 'cap-right', C=1, D=0.02,
+                        S=surface(10.91, 0.002, Al_Li)),
+                 volume(0.4537, 'walls', N=4,
+                        S=surface(12.64, 0.002, composits)),
+                 ],
+                add_mass=0.04,
+                add_cost=450)
+
+#utilities
+@parts.register('Adapter')
+def adapter(name):
+    return part(name, 
+                [volume(2.845, 'hull', C=50,
+                        S=surface(13.02, 0.006, composits))])
+
+@parts.register('Radial Adapter 2')
+def r_adapter2(name):
+    return part(name, 
+                [volume(2.09+0.163*2, 'hull', C=50, D=0.01,
+                        S=surface(10.01+1.86*2, 0.006, Al_Li))])
+
+@parts.register('Radial Adapter 1')
+def r_adapter1(name):
+    return part(name, 
+                [volume(1.24+0.213+0.163, 'hull', C=50, D=0.01,
+                        S=surface(6.37+2.37+1.86, 0.006, Al_Li))])
+
+@parts.register('Station Hub')
+def station_hub(name):
+    return part(name, 
+                [volume(7.49, 'hull', C=80, D=0.002,
+                        S=surface(29.76, 0.01, Al_Li))])
+
+@parts.register('Docking Port')
+def docking_port(name):
+    return part(name, 
+                [volume(0.635, 'hull', C=1380, D=0.1, 
+                        S=surface(13.89, 0.005, aluminium))])
+
+@parts.register('SpaceportRCS')
+def rcs(name):
+    return part(name, 
+                [volume(0.36, 'machinery', C=4760, D=0.3, 
+                        S=surface(4.77, 0.007, composits))])
+
+@parts.register('SquareHeatshield2')
+def small_heatshield(name):
+    return part(name, 
+                [volume(0.0627, 'hull', C=500, D=0.75,
+                        S=surface(3.44, 0.005, aluminium))],
+                res_cost=100) #Ablator
+
+@parts.register('SquareHeatshield')
+def heatshield(name):
+    return part(name, 
+                [volume(3.8, 'hull', C=20, D=0.01,
+                        S=surface(40.7, 0.005, aluminium))],
+                res_cost=900) #Ablator
+
+@parts.register('SurfaceTail')
+def srf_tail(name):
+    return part(name, 
+                [volume(0.6, 'hull', C=20, D=0.01,
+                        S=surface(6.85, 0.003, Al_Li))])
+
+@parts.register('Airbrake')
+def airbrake(name):
+    return part(name,
+                [volume(0.19, 'hull', C=2000, D=0.01,
+                        S=surface(6.5, 0.002, Al_Li)),
+                 volume(0.0051, 'outer-cylinder', material=Al_Li,
+                        V=[volume(0.0012, 'inner_cylinder', material=Al_Li)]),
+                 volume(0.001+0.00092+0.00064+0.0008+0.0022, 
+                        'hinges-axis', material=Al_Li),
+                 volume(0.039, 'brake', 
+                        S=surface(3.97, 0.002, Al_Li)),
+                 ])
+
+@parts.register('Krent700')
+def krent700(name):
+    return part(name, 
+                [volume(20.17, 'hose', C=200, D=0.02,
+                        S=surface(62.916, 0.001, Al_Li),
+                        V=[volume(10.47, 'engine', M=5.54, C=1000)]),
+                 volume(1.206, 'fixer', C=100, D=0.1)])
+
+@parts.register('RadialSabre')
+def rad_sabre(name):
+    return part(name, 
+                [volume(3.727, 'hull', C=200, D=0.02,
+                        S=surface(26.07, 0.003, Al_Li),
+                        V=[volume(3, 'engines', M=1.3, C=8000)])])
+
+@parts.register('RadialHeavyEngine')
+def rad_heavy(name):
+    return part(name, 
+                [volume(1.46, 'hull', C=200, D=0.02,
+                        S=surface(10.75, 0.003, Al_Li),
+                        V=[volume(0.8, 'engines', M=0.95, C=2000)])])
+
+@parts.register('HoverFan')
+def hover_fan(name):
+    return part(name, 
+                [volume(0.076, 'base', C=200, D=0.01,
+                        S=surface(1.228, 0.003, Al_Li)),
+                 volume(0.01, 'motor-fixer', C=200, D=0.01,
+                        S=surface(0.524, 0.003, Al_Li)),
+                 volume(0.023, 'central-fixer', C=200, D=0.01,
+                        S=surface(1.59, 0.003, Al_Li)),
+                 volume(0.118, 'stator', C=200, D=0.01,
+                        S=surface(7.227, 0.003, composits)),
+                 volume(0.08, 'motor', C=2000, M=0.2),
+                 volume(0.002, 'blades', C=200, D=0.01, N=4,
+                        S=surface(0.42, 0.001, composits)),
+                 ])
+
+#     def hover_takeoff_weight(thrust, k, size, netto=True):
+#         m = parts.get('HoverFan').mass(size) if netto else 0
+#         return (thrust*k*size**2/9.81-m)*4/2.0 
+#     
+#     def hover_w_vs_s(thrust, k=0.8):
+#         print np.array([(s, hover_takeoff_weight(thrust, k, s), hover_takeoff_weight(thrust, k, s, False)) for s in np.arange(0.5, 4.5, 0.5)])
+#         print
+#         
+#     hover_w_vs_s(50); hover_w_vs_s(40); hover_w_vs_s(30); hover_w_vs_s(20);
+#     
+#     sys.exit()
+
+@parts.register('TurboGenerator')
+def turbogen(name):
+    return part(name, 
+                [volume(1.958, 'hull', C=200, D=0.01,
+                        S=surface(13.13, 0.001, Al_Li),
+                        V=[volume(1.5, 'turboshaft', M=0.327, C=1000)]),
+                 volume(0.095, 'compressor', C=200, D=0.01,
+                        S=surface(0.525, 0.003, Al_Li)),
+                 ])
+
+#extensions
+@parts.register('HangarExtension')
+def extension(name):
+    return part(name,
+                [volume(19.43, 'hull', C=500, M=0.2,
+                        S=surface(41.56, 0.006, Al_Li),
+                        V=[volume(19.43*0.9**3, 'storage')])])
+
+@parts.register('HangarExtensionL')
+def extensionL(name):
+    return part(name,
+                [volume(68.47, 'hull', C=500, M=0.3,
+                        S=surface(94.59, 0.006, Al_Li),
+                        V=[volume(47.33, 'storage')])])
+
+@parts.register('HangarExtensionXL')
+def extensionXL(name):
+    return part(name,
+                [volume(117.98, 'hull', C=1200, M=0.4,
+                        S=surface(129.39, 0.006, Al_Li),
+                        V=[volume(88.43, 'storage')])])
+
+#ExLP
+@parts.register('Recycler')
+def recycler(name):
+    return part(name, 
+                [volume(4.39, 'hull', C=10, D=0.01,
+                        S=surface(14.9, 0.005, aluminium),
+                        V=[volume(2.3, 'machinery', C=1000, D=0.317),
+                           volume(2, 'metal-tank', C=20)]),
+                 volume(0.18,'clamp', C=3000, D=0.78)])
+
+
+#asteroid hangars
+@parts.register('StructuralGrapple')
+def struct_grapple(name):
+    return part(name,
+                [volume(2.76, 'hull', C=200, D=0.01,
+                        S=surface(23.83, 0.006, Al_Li),
+                        V=[battery(E=1000),
+                           volume(1.0, 'machinery', C=500, D=0.3)]),
+                 volume(0.026, 'outer-cylinders', N=4, material=aluminium,
+                        V=[volume(0.0025, 'inner_cylinders', material=aluminium)]),
+                 volume(0.008+0.0007+0.0009+0.0036+0.0018+0.001+0.006, 
+                        'levers-axis', material=aluminium, N=4),
+                 volume(0.039, 'clinches', C=1000, D=0.9, N=4),
+                 volume(0.012, 'clinch-caps', C=100, D=0.1, N=4,
+                        S=surface(0.97, 0.006, Al_Li)),
+                 ])
+
+@parts.register('SquarePort')
+def asteroid_port(name):
+    return part(name,
+                [volume(7.99, 'hull', C=3180, M=1.2, 
+                        S=surface(94.89, 0.003, steel))
+                 ])
+
+@parts.register('SquarePortAdater')
+def asteroid_port_adapter(name):
+    return part(name,
+                [volume(3.96, 'hatch-port', C=2053, M=0.8, 
+                        S=surface(38.78, 0.006, Al_Li)),
+                 volume(0.276, 'hatch-port-support', C=100, D=0.1, N=4, 
+                        S=surface(4.93, 0.006, Al_Li)),
+                 volume(2.3, 'S2-port', C=100, D=0.1, 
+                        S=surface(13.62, 0.006, Al_Li),
+                        V=[battery(E=2000),
+                           reaction_wheel(T=32)])
+                 ],
+                add_cost=400) #light
+
+@parts.register('AsteroidHatch')
+def asteroid_hatch(name):
+    return part(name,
+                [volume(1.45, 'frames', C=1000, D=0.9, N=2,
+                        S=surface(27.34, 0.005, steel),
+                        V=[battery(E=1000)]),
+                 volume(0.027, 'outer-cylinders', N=4, material=steel,
+                        V=[volume(0.023, 'bolts', material=steel)]),
+                 volume(0.36, 'clamps', C=1000, D=0.9, N=4, 
+                        S=surface(8.77, 0.005, steel)),
+                 volume(0.031, 'hinges', C=500, D=0.7, N=8),
+                 ])
+
+@parts.register('AsteroidDrill')
+def asteroid_drill(name):
+    return part(name,
+                [volume(143.63, 'base', C=2, D=0.05,
+                        S=surface(171.22, 0.005, steel),
+                        V=[volume(120, 'machinery', C=8350, M=12),
+                           volume(10, 'rock-tank', C=20),
+                           volume(5, 'rcs-tank', C=20),
+                           reaction_wheel(V=7),
+                           generator(E=15)]),
+                 volume(43.08, 'main-drill', C=23780, M=6,
+                        S=surface(81.66, 0.005, steel)),
+                 volume(0.68, 'drill-support', C=2, D=0.01, N=4,
+                        S=surface(9.16, 0.01, steel)),
+                 volume(2.92, 'motors', C=1370, M=4, N=4),
+                 battery(V=1.45*4),
+                 ]+parts.get('SquarePort').volumes,
+                add_mass=0.04, #probe core
+                add_cost=3400) #probe core
+
+@parts.register('AsteroidGateway')
+def asteroid_gateway(name):
+    return part(name, 
+                [volume(24.24, 'hull', C=100, D=0.1,
+                        S=surface(219.04, 0.007, Al_Li),
+                        V=[battery(E=10000),
+                           reaction_wheel(V=6.0),
+                           generator(E=6.0),
+                           volume(5, 'monopropellent tank', C=20)]),
+                 volume(1.54, 'doors', C=2, D=0.01, N=2,
+                        S=surface(32.2, 0.007, Al_Li)),
+                 volume(22.62, 'cabins', C=100, D=0.1, N=2, 
+                        S=surface(52.17, 0.007, Al_Li),
+                        V=[volume(4.23, 'corridor', C=1, D=0.0012,
+                                  S=surface(18.26, 0.001, composits)),
+                           volume(2.3, 'cabins', C=2000, M=0.35, N=6,
+                                  S=surface(10.54, 0.001, composits)),
+                           volume(0.0009, 'lamp-fixer', material=aluminium),
+                           volume(0.013, 'lamp', C=10000, D=0.5,
+                                  S=surface(0.41, 0.0004, aluminium)), 
+                           volume(0.18, 'door', C=100, D=0.1,
+                                  S=surface(0.71, 0.007, Al_Li)),
+                           volume(0.0017+0.0027+0.002+0.0008, 'ladder', material=aluminium),
+                           volume(0.0013, 'ladder-fixer', material=steel),
+                           ]),
+                 ]+parts.get('SquarePort').volumes,
+                add_mass=0.08, #probe core
+                add_cost=600 + 3400,  #Light + probe core
+                res_cost=0)
+
+@parts.register('RockOreConverter')
+def ore_converter(name):
+    return part(name,
+                [volume(12.46, 'hull', C=1, D=0.02,
+                        S=surface(29.98, 0.006, Al_Li),
+                        V=[volume(12.0, 'machinery', C=2850, M=1.530)])])
+
+@parts.register('MobileSmelter')
+def mobile_smelter(name):
+    return part(name,
+                [volume(12.46, 'hull', C=1, D=0.02,
+                        S=surface(29.98, 0.003, steel),
+                        V=[volume(12.0, 'machinery', C=6970, M=0.730)])])
+
+@parts.register('SubstrateMixer')
+def substrate_mixer(name):
+    return part(name,
+                [volume(12.46, 'hull', C=1, D=0.02,
+                        S=surface(29.98, 0.006, Al_Li),
+                        V=[volume(2.0, 'machinery', C=1730, M=0.330),
+                           volume(10, 'tanks', C=20)])])
+
+@parts.register('*TankS')
+def small_tank(name):
+    return part(name,
+                [volume(19.43/2, 'hull', 
+                        S=surface(25.56, 0.006, Al_Li))])
+
+@parts.register('RadialTank')
+def radial_tank(name):
+    return part(name,
+                [volume(0.25, 'hull', C=1, D=0.2,
+                        S=surface(2.23, 0.005, Al_Li),
+                        V=[volume(0.241, 'container')]),
+                 volume(0.006, 'door', C=12, D=2.63)])
@@ -0,0 +1,191 @@
+'''
+Mapping of MassCalc parts to the PART nodes of the GameData configs
+and in-place update of the values computed by MassCalc.
+'''
+import os
+import re
+
+#PART nodes are matched by the header of the MassCalc report pasted into them:
+#    //================ InlineHangar ================
+report_header = re.compile(r'^\s*//=+ (.+?) =+\s*$')
+
+#explicit MassCalc name -> PART names mapping for the configs without a header
+#or with several of them; it takes precedence over the headers
+cfg_names = {'SquareHeatshield': ['SquareHeatshield']}
+
+#PART-level values and their format
+part_values = (('entryCost', '%d'),
+               ('cost',      '%d'),
+               ('mass',      '%.6f'))
+
+#MODULE-level values; written as in the report, with the weights comment
+module_values = ('specificMass', 'specificCost')
+
+rtol = 1e-9
+
+
+def _read_lines(filename):
+    with open(filename) as f: return f.readlines()
+
+
+def map_parts(index):
+    '''Returns {MassCalc name: [(filename, PART node), ...]} for all indexed configs'''
+    mapping = {}
+    for name, part_names in cfg_names.items():
+        for pname in part_names:
+            mapping.setdefault(name, []).extend(index.find_part(pname))
+    explicit = set(pname for part_names in cfg_names.values() for pname in part_names)
+    for filename in sorted(index.files):
+        lines = None
+        for p in index.files[filename].parts:
+            if p.get('name') in explicit: continue
+            if lines is None: lines = _read_lines(filename)
+            headers = [m.group(1) for m in
+                       (report_header.match(l) for l in lines[p.line:p.end+1]) if m]
+            #several reports in one PART mean hand-combined values
+            if len(headers) == 1:
+                mapping.setdefault(headers[0], []).append((filename, p))
+    return mapping
+#end def
+
+
+def _floats(value):
+    try: return [float(x) for x in value.split(',')]
+    except ValueError: return None
+
+
+def same_values(old, new, tol=rtol):
+    '''Compares two comma separated lists of numbers with relative tolerance'''
+    a, b = _floats(old), _floats(new)
+    if a is None or b is None or len(a) != len(b): return old == new
+    return all(abs(x-y) <= tol*max(abs(x), abs(y), 1e-12) for x, y in zip(a, b))
+#end def
+
+
+class edit(object):
+    '''Replacement of the [start, end) span of a line of a config file'''
+    def __init__(self, line, start, end, text, key, old, new):
+        self.line  = line
+        self.start = start
+        self.end   = end
+        self.text  = text
+        self.key   = key
+        self.old   = old
+        self.new   = new
+#end class
+
+
+def differences(p, node, tol=rtol):
+    '''
+    Generates (key, config_value, new value) for every value of the PART node
+    (and of its modules) that differs from the computed one by more than tol.
+    '''
+    metrics = p.metrics()
+    for key, fmt in part_values:
+        v = node.get_value(key)
+        if v is None: continue
+        new = fmt % metrics[key]
+        if not same_values(v.value, new, tol): yield key, v, new
+    for m in node.get_nodes('MODULE'):
+        for key in module_values:
+            v = m.get_value(key)
+            if v is None: continue
+            new = ', '.join(str(x) for x in metrics[key])
+            if not same_values(v.value, new, tol): yield key, v, new
+#end def
+
+
+def part_edits(p, node, lines):
+    '''Edits needed to bring the values of the PART node in line with the part'''
+    weights = {'specificMass': p._weights, 'specificCost': p._cost_weights}
+    edits = []
+    for key, v, new in differences(p, node):
+        text, end = new, v.end
+        #the weights comment is rewritten only if the weights changed too
+        if key in weights and v.comment is not None and v.comment.startswith('weights:'):
+            w = ', '.join(str(x) for x in weights[key])
+            if not same_values(v.comment[len('weights:'):].strip(' []'), w):
+                text = '%s //weights: [ %s ]' % (new, w)
+                end  = len(lines[v.line].rstrip('\r\n'))
+        edits.append(edit(v.line, v.start, end, text, key, v.value, new))
+    return edits
+#end def
+
+
+def apply_edits(filename, lines, edits):
+    '''
+    Applies the edits to the lines and rewrites the file, keeping everything else intact.
+    The file is replaced by a complete new one, so an interrupted write cannot truncate it.
+    '''
+    for e in sorted(edits, key=lambda e: (e.line, -e.start)):
+        l = lines[e.line]
+        lines[e.line] = l[:e.start]+e.text+l[e.end:]
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    try:
+        with open(tmp, 'w') as f: f.writelines(lines)
+        os.rename(tmp, filename)
+    except BaseException:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+#end def
+
+
+def write_cfg(parts, index):
+    '''
+    Updates the values of the given parts in the configs of the index.
+    Only the files with changed values are rewritten.
+    Returns {filename: [edit, ...]} of the rewritten files.
+    '''
+    #the edits are made at the offsets of the index,
+    #so the files changed since it was built are parsed again
+    index.update()
+    mapping = map_parts(index)
+    by_file = {}
+    for p in parts:
+        for filename, node in mapping.get(p.name, []):
+            by_file.setdefault(filename, []).append((p, node))
+    changed = {}
+    for filename in sorted(by_file):
+        lines = _read_lines(filename)
+        edits = []
+        for p, node in by_file[filename]:
+            edits.extend(part_edits(p, node, lines))
+        if not edits: continue
+        apply_edits(filename, lines, edits)
+        changed[filename] = edits
+    if changed: index.update()
+    return changed
+#end def
+
+
+class mismatch(object):
+    def __init__(self, part, filename, key, value, new):
+        self.part     = part
+        self.filename = filename
+        self.key      = key
+        self.value    = value
+        self.new      = new
+
+    @property
+    def error(self):
+        '''The largest relative difference between the config and the computed numbers'''
+        a, b = _floats(self.value.value), _floats(self.new)
+        if a is None or b is None or len(a) != len(b): return float('inf')
+        return max(abs(x-y)/max(abs(x), abs(y), 1e-12) for x, y in zip(a, b))
+#end class
+
+
+def verify(parts, index, tol=1e-6):
+    '''
+    Compares the computed values of the parts with their configs.
+    Returns (mismatches, names of the parts without a config) in the order of the parts.
+    '''
+    #the comparisons take microseconds; threads would only add overhead under the GIL
+    mapping = map_parts(index)
+    parts   = list(parts)
+    missing = [p.name for p in parts if p.name not in mapping]
+    mismatches = [mismatch(p.name, filename, key, v, new)
+                  for p in parts for filename, node in mapping.get(p.name, ())
+                  for key, v, new in differences(p, node, tol)]
+    return mismatches, missing
+#end def
@@ -1,12 +1,19 @@
 from base_classes import volume, surface, material
 import numpy as np
 
-steel      = material(8.05,  2.0)
-aluminium  = material(2.7,   8.0)
-Al_Li      = material(2.63, 12.0)
-composits  = material(1.9,  20.0)
-compositsL = material(1.3,  18.0)
-lavsan     = material(300e-6/0.001, 1)
+steel      = material(8.05,  2.0, 'steel')
+aluminium  = material(2.7,   8.0, 'aluminium')
+Al_Li      = material(2.63, 12.0, 'Al_Li')
+composits  = material(1.9,  20.0, 'composits')
+compositsL = material(1.3,  18.0, 'compositsL')
+lavsan     = material(300e-6/0.001, 1, 'lavsan')
+
+
+def named_materials():
+    '''{name: material} of the named materials defined in this module'''
+    return dict((m.name, m) for m in globals().values()
+                if isinstance(m, material) and m.name)
+#end def
 
 class _custom_volume(volume):
     _name = 'custom volume'
@@ -16,12 +23,11 @@ class _custom_volume(volume):
     def __init__(self, vol):
         volume.__init__(self, vol, self._name, C=self._cost_density, D=self._density)
         
-    def _add_str(self): return ''
+    def _add_lines(self): return ()
     
-    def __str__(self):
-        s  = volume.__str__(self)
-        s += self._add_str()
-        return s
+    def _lines(self, ev):
+        for line in volume._lines(self, ev): yield line
+        for line in self._add_lines(): yield line
 #end class
 
 
@@ -64,10 +70,9 @@ class reaction_wheel_real(_custom_volume):
     
     def __init__(self, vol):
         _custom_volume.__init__(self, vol)
-        mat = material(steel.density, self._vol2cost(vol))
         s = self.cylS(vol)
-        h = self._vol2mass(vol)/mat.density/s
-        mat.cost = mat.cost/s/h*surface.unit_h
+        h = self._vol2mass(vol)/steel.density/s
+        mat = material(steel.density, self._vol2cost(vol)/s/h*surface.unit_h)
         volume.__init__(self, vol, self._name, C=0, D=0,
                         S=surface(s, h, mat))
         
@@ -77,10 +82,9 @@ class reaction_wheel_real(_custom_volume):
     @property
     def energy(self): return self._vol2energy(self._V)
     
-    def _add_str(self):
-        s  = '   torque = %.0f\n' % (self._vol2torque(self._V)) 
-        s += '   rate = %.3f\n' % (self._vol2energy(self._V))
-        return s
+    def _add_lines(self):
+        yield '   torque = %.0f' % (self._vol2torque(self._V)) 
+        yield '   rate = %.3f' % (self._vol2energy(self._V))
 #end class
 
 class reaction_wheel(_custom_volume):
@@ -97,7 +101,7 @@ class reaction_wheel(_custom_volume):
     
     _thickness = 0.05
     _material = material(0.1/1.48814376854/_thickness, 
-                         1200/1.48814376854/_thickness*surface.unit_h)
+                         1200/1.48814376854/_thickness*surface.unit_h, 'reaction wheel')
     
     _hd_ratio = 5.0
     
@@ -131,11 +135,10 @@ class reaction_wheel(_custom_volume):
     @property
     def energy(self): return self._spec_energy*self.full_mass()
      
-    def _add_str(self):
+    def _add_lines(self):
         m = self.full_mass()
-        s  = '   torque = %.0f\n' % (self._spec_torque*m) 
-        s += '   rate = %.3f\n' % (self._spec_energy*m)
-        return s
+        yield '   torque = %.0f' % (self._spec_torque*m) 
+        yield '   rate = %.3f' % (self._spec_energy*m)
 #end class
 
 class solar_panel(_custom_volume):
@@ -145,15 +148,15 @@ class solar_panel(_custom_volume):
     
     _thickness = 0.01
     _surface_energy = 1.3479107
-    _material = material(2.5894795, 224.65179)
+    _material = material(2.5894795, 224.65179, 'solar panels')
     
     def __init__(self, S):
         self.energy = S*self._surface_energy
         _custom_volume.__init__(self, S*self._thickness)
         self._surface = surface(S, self._thickness, self._material)
         
-    def _add_str(self):
-        return '   chargeRate = %.3f\n' % self.energy
+    def _add_lines(self):
+        yield '   chargeRate = %.3f' % self.energy
 #end class
 
 class battery(_custom_volume):
@@ -192,8 +195,8 @@ class battery(_custom_volume):
         _custom_volume.__init__(self, V)
     #end def
     
-    def _add_str(self):
-        return '   energy amount = %.1f\n' % self.energy 
+    def _add_lines(self):
+        yield '   energy amount = %.1f' % self.energy
 #end class
 
 
@@ -204,6 +207,6 @@ class generator(battery):
     _energy_cost     = 4400       #Cr/(El.u/s)
     _energy_density  = 61.124694  #(El.u/s)/m^3
 
-    def _add_str(self):
-        return '   energy rate = %.3f\n' % self.energy 
+    def _add_lines(self):
+        yield '   energy rate = %.3f' % self.energy
 #end class
\ No newline at end of file
@@ -0,0 +1,274 @@
+'''
+Streaming parser of KSP ConfigNode files (*.cfg) and an on-disk cached
+index of the PART nodes found in a GameData tree.
+'''
+import os
+import sys
+import hashlib
+import fnmatch
+try: import cPickle as pickle
+except ImportError: import pickle
+
+
+class config_value(object):
+    '''
+    A "key = value" line of a ConfigNode; line is the 0-based line number,
+    [start, end) is the position of the value within that line.
+    '''
+    def __init__(self, key, value, comment, line, start, end):
+        self.key     = key
+        self.value   = value
+        self.comment = comment
+        self.line    = line
+        self.start   = start
+        self.end     = end
+
+    def __repr__(self): return '%s = %s' % (self.key, self.value)
+#end class
+
+
+class config_node(object):
+    '''A named node; line and end are the 0-based lines of its opening and closing braces'''
+    def __init__(self, name, line=-1):
+        self.name   = name
+        self.line   = line
+        self.end    = -1
+        self.values = []
+        self.nodes  = []
+
+    def get(self, key, default=None):
+        for v in self.values:
+            if v.key == key: return v.value
+        return default
+    #end def
+
+    def get_value(self, key):
+        for v in self.values:
+            if v.key == key: return v
+        return None
+    #end def
+
+    def get_values(self, key): return [v.value for v in self.values if v.key == key]
+
+    def get_nodes(self, name, **values):
+        '''Subnodes with the given name whose values match the keyword arguments'''
+        return [n for n in self.nodes if n.name == name and
+                all(n.get(k) == v for k, v in values.items())]
+
+    def get_node(self, name, **values):
+        nodes = self.get_nodes(name, **values)
+        return nodes[0] if nodes else None
+
+    def walk(self):
+        yield self
+        for n in self.nodes:
+            for sn in n.walk(): yield sn
+    #end def
+
+    def __repr__(self):
+        return '%s { %d values, %d nodes }' % (self.name, len(self.values), len(self.nodes))
+#end class
+
+
+class ParseError(Exception):
+    def __init__(self, filename, line, message):
+        Exception.__init__(self, '%s:%d: %s' % (filename, line+1, message))
+        self.filename = filename
+        self.line     = line
+#end class
+
+
+def parse(lines, filename='<string>'):
+    '''
+    Parses an iterable of lines into the root config_node whose subnodes
+    are the top level nodes of the file. Lines are consumed one by one,
+    so a file object is parsed without reading it as a whole.
+    '''
+    root  = config_node('', -1)
+    stack = [root]
+    name  = None
+    for i, raw in enumerate(lines):
+        raw = raw.rstrip('\r\n')
+        if i == 0 and raw.startswith('\xef\xbb\xbf'):
+            raw = ' '*3 + raw[3:]
+        code, sep, comment = raw.partition('//')
+        comment = comment.strip() if sep else None
+        pos = 0
+        while pos <= len(code):
+            brace = len(code)
+            for ch in '{}':
+                b = code.find(ch, pos)
+                if 0 <= b < brace: brace = b
+            segment = code[pos:brace]
+            if '=' in segment:
+                eq    = segment.index('=')
+                key   = segment[:eq].strip()
+                value = segment[eq+1:]
+                start = pos+eq+1 + len(value)-len(value.lstrip())
+                value = value.strip()
+                if not value: start = pos+eq+1
+                stack[-1].values.append(config_value(key, value, comment, i,
+                                                     start, start+len(value)))
+                name = None
+            elif segment.strip():
+                name = segment.strip()
+            if brace == len(code): break
+            if code[brace] == '{':
+                if name is None:
+                    raise ParseError(filename, i, 'node without a name')
+                node = config_node(name, i)
+                stack[-1].nodes.append(node)
+                stack.append(node)
+                name = None
+            else:
+                if len(stack) < 2:
+                    raise ParseError(filename, i, 'unbalanced }')
+                stack.pop().end = i
+            pos = brace+1
+    if len(stack) > 1:
+        raise ParseError(filename, stack[-1].line, 'unclosed node %s' % stack[-1].name)
+    return root
+#end def
+
+
+def load(filename):
+    with open(filename) as f: return parse(f, filename)
+
+
+def file_hash(filename):
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''): h.update(chunk)
+    return h.hexdigest()
+#end def
+
+
+class config_file(object):
+    def __init__(self, filename, mtime, size, sha1, root):
+        self.filename = filename
+        self.mtime    = mtime
+        self.size     = size
+        self.sha1     = sha1
+        self.root     = root
+
+    @property
+    def parts(self): return self.root.get_nodes('PART')
+#end class
+
+
+class config_index(object):
+    '''
+    Index of all *.cfg files under the root directory and of the PART nodes in them.
+    Parsed files are cached on disk; a file is reparsed only if its mtime
+    or size changed and its content hash differs from the cached one.
+    '''
+    cache_version = 2
+
+    def __init__(self, root_dir, cache_file=None):
+        self.root_dir   = os.path.abspath(root_dir)
+        self.cache_file = cache_file
+        self.files      = {}
+        self.parts      = {}
+        self.parsed     = 0
+        self._load_cache()
+        self.update()
+    #end def
+
+    def _load_cache(self):
+        if not self.cache_file or not os.path.isfile(self.cache_file): return
+        try:
+            with open(self.cache_file, 'rb') as f:
+                version, root_dir, files = pickle.load(f)
+        except Exception:
+            return
+        if version == self.cache_version and root_dir == self.root_dir:
+            self.files = files
+    #end def
+
+    def save(self):
+        if not self.cache_file: return
+        tmp = self.cache_file+'.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((self.cache_version, self.root_dir, self.files), f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, self.cache_file)
+    #end def
+
+    def scan(self):
+        for dirpath, dirnames, filenames in os.walk(self.root_dir):
+            dirnames.sort()
+            for fn in sorted(fnmatch.filter(filenames, '*.cfg')):
+                yield os.path.join(dirpath, fn)
+    #end def
+
+    def update(self):
+        '''Rescans the tree, reparsing changed files; returns the list of reparsed files'''
+        changed = []
+        files   = {}
+        dirty   = False
+        for filename in self.scan():
+            st = os.stat(filename)
+            cached = self.files.get(filename)
+            if cached is None or cached.mtime != st.st_mtime or cached.size != st.st_size:
+                dirty = True
+                sha1  = file_hash(filename)
+                if cached is None or cached.sha1 != sha1:
+                    cached = config_file(filename, st.st_mtime, st.st_size,
+                                         sha1, load(filename))
+                    changed.append(filename)
+                else:
+                    cached.mtime = st.st_mtime
+                    cached.size  = st.st_size
+            files[filename] = cached
+        dirty = dirty or set(files) != set(self.files)
+        self.files  = files
+        self.parsed = len(changed)
+        self.parts  = {}
+        for f in sorted(self.files):
+            for p in self.files[f].parts:
+                self.parts.setdefault(p.get('name'), []).append((f, p))
+        if dirty: self.save()
+        return changed
+    #end def
+
+    def find_part(self, name):
+        '''Returns the (filename, PART node) pairs of the part with the given name'''
+        return self.parts.get(name, [])
+
+    def modules(self, part_name, module_name=None):
+        for filename, p in self.find_part(part_name):
+            for m in p.get_nodes('MODULE'):
+                if module_name is None or m.get('name') == module_name:
+                    yield filename, m
+    #end def
+#end class
+
+
+default_cache = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cfg-index.cache')
+default_gamedata = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'GameData')
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Query the PART nodes of a GameData tree')
+    parser.add_argument('gamedata', nargs='?', default=default_gamedata)
+    parser.add_argument('-p', '--part', action='append', metavar='NAME',
+                        help='show the values of the parts matching NAME (glob)')
+    parser.add_argument('-m', '--module', metavar='NAME',
+                        help='show only the MODULE nodes with this name')
+    parser.add_argument('--cache', default=default_cache, metavar='FILE')
+    args = parser.parse_args()
+    index = config_index(args.gamedata, args.cache)
+    names = sorted(n for n in index.parts if n and
+                   (not args.part or any(fnmatch.fnmatchcase(n, p) for p in args.part)))
+    for name in names:
+        for filename, p in index.find_part(name):
+            print('%s: %s' % (name, os.path.relpath(filename, index.root_dir)))
+            if not args.part: continue
+            nodes = [p] if args.module is None else \
+                [m for m in p.get_nodes('MODULE') if m.get('name') == args.module]
+            for n in nodes:
+                if n is not p: print('  MODULE %s' % n.get('name'))
+                for v in n.values: print('    %s = %s' % (v.key, v.value))
+    sys.stderr.write('%d files, %d parts, %d parsed\n' %
+                     (len(index.files), len(index.parts), index.parsed))
@@ -0,0 +1,120 @@
+import csv
+import json
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+#per-node metrics of the evaluation record that are exported
+node_metrics = ('full_V', 'V', 'S', 'full_S',
+                'V_mass', 'S_mass', 'full_V_mass', 'full_S_mass', 'full_mass',
+                'V_cost', 'S_cost', 'full_V_cost', 'full_S_cost', 'full_cost')
+
+part_columns = ('entryCost', 'cost', 'mass',
+                'specificMass', 'specificCost',
+                'add_mass', 'add_cost', 'res_cost', 'size')
+
+
+class catalog_table(object):
+    '''
+    Summary metrics and per-node breakdown of a set of parts in columnar form,
+    collected in a single pass over the parts.
+    '''
+    def __init__(self, parts):
+        self.parts = []
+        self.nodes = []
+        for p in parts: self.add(p)
+    #end def
+
+    def add(self, p):
+        row = OrderedDict(name=p.name)
+        row.update(p.metrics())
+        row['add_mass'] = p._add_mass
+        row['add_cost'] = p._add_cost
+        row['res_cost'] = p._res_cost
+        row['size']     = p._size
+        part_index = len(self.parts)
+        self.parts.append(row)
+        for ev in p.evaluate():
+            parents = {}
+            for depth, rec in ev.walk():
+                parent = parents.get(depth-1)
+                node = OrderedDict([('part', p.name),
+                                    ('part_index', part_index),
+                                    ('index', len(self.nodes)),
+                                    ('parent', parent['index'] if parent else -1),
+                                    ('depth', depth),
+                                    ('path', '%s/%s' % (parent['path'], rec.volume.name)
+                                     if parent else rec.volume.name),
+                                    ('name', rec.volume.name),
+                                    ('pcs', rec.volume.pcs)])
+                for m in node_metrics: node[m] = getattr(rec, m)
+                parents[depth] = node
+                self.nodes.append(node)
+    #end def
+
+    def as_dict(self):
+        nodes = {}
+        for node in self.nodes:
+            nodes.setdefault(node['part_index'], []).append(node)
+        parts = []
+        for i, row in enumerate(self.parts):
+            row = OrderedDict(row)
+            row['nodes'] = [OrderedDict((k, v) for k, v in node.items()
+                                        if k not in ('part', 'part_index'))
+                            for node in nodes.get(i, [])]
+            parts.append(row)
+        return OrderedDict(parts=parts)
+    #end def
+
+    def write_json(self, filename):
+        with open(filename, 'w') as out:
+            json.dump(self.as_dict(), out, indent=1)
+
+    def write_csv(self, filename):
+        '''Writes the summary to filename and the node breakdown to filename.nodes.csv'''
+        with _open_csv(filename) as out:
+            w = csv.writer(out)
+            w.writerow(('name',)+part_columns)
+            for row in self.parts:
+                w.writerow([row['name']] +
+                           [' '.join(repr(x) for x in row[c]) if isinstance(row[c], list)
+                            else repr(row[c]) for c in part_columns])
+        with _open_csv(_nodes_filename(filename)) as out:
+            w = csv.writer(out)
+            if not self.nodes: return
+            w.writerow(list(self.nodes[0]))
+            for node in self.nodes:
+                w.writerow([repr(v) if isinstance(v, float) else v for v in node.values()])
+    #end def
+
+    def write_npz(self, filename):
+        '''
+        Writes all the columns into a compressed .npz; part_* arrays are per part,
+        node_* arrays are per node with node_part being the index of the part.
+        '''
+        cols = {}
+        cols['part_name'] = np.array([row['name'] for row in self.parts], dtype=np.unicode_)
+        for c in part_columns:
+            cols['part_'+c] = np.array([row[c] for row in self.parts], dtype=float)
+        cols['node_part']   = np.array([n['part_index'] for n in self.nodes], dtype=int)
+        cols['node_parent'] = np.array([n['parent'] for n in self.nodes], dtype=int)
+        cols['node_depth']  = np.array([n['depth'] for n in self.nodes], dtype=int)
+        cols['node_name']   = np.array([n['name'] for n in self.nodes], dtype=np.unicode_)
+        cols['node_path']   = np.array([n['path'] for n in self.nodes], dtype=np.unicode_)
+        cols['node_pcs']    = np.array([n['pcs'] for n in self.nodes], dtype=float)
+        for m in node_metrics:
+            cols['node_'+m] = np.array([n[m] for n in self.nodes], dtype=float)
+        np.savez_compressed(filename, **cols)
+    #end def
+#end class
+
+
+def _nodes_filename(filename):
+    base, dot, ext = filename.rpartition('.')
+    if not dot or '/' in ext: return filename+'.nodes'
+    return '%s.nodes.%s' % (base, ext)
+
+def _open_csv(filename):
+    if sys.version_info[0] < 3: return open(filename, 'wb')
+    return open(filename, 'w', newline='')
@@ -0,0 +1,116 @@
+import numpy as np
+
+#metrics proportional to scale**3*length and to scale**2*length
+cubic_metrics     = ('full_V', 'V', 'V_cost', 'full_V_cost', 'V_mass', 'full_V_mass')
+quadratic_metrics = ('S', 'full_S', 'S_cost', 'full_S_cost', 'S_mass', 'full_S_mass')
+
+
+class flat_evaluation(object):
+    '''
+    Metrics of every node of a flat_tree at the given scale and length.
+    Each metric is an array of shape broadcast(scale, length).shape+(nodes,)
+    and has the same meaning as the attribute of the evaluation record.
+    '''
+    def __init__(self, tree, scale, length):
+        self.tree   = tree
+        scale       = np.asarray(scale, dtype=float)[...,None]
+        length      = np.asarray(length, dtype=float)[...,None]
+        k3 = scale**3*length
+        k2 = scale**2*length
+        for m in cubic_metrics:     setattr(self, m, tree.unit[m]*k3)
+        for m in quadratic_metrics: setattr(self, m, tree.unit[m]*k2)
+        self.full_cost = self.full_V_cost + self.full_S_cost
+        self.full_mass = self.full_V_mass + self.full_S_mass
+    #end def
+
+    def total(self, metric):
+        '''Sum of the full_* metric over the root nodes'''
+        return getattr(self, metric)[...,self.tree.roots].sum(axis=-1)
+#end class
+
+
+class flat_tree(object):
+    '''
+    Struct-of-arrays representation of a volume tree.
+
+    Nodes are stored in depth-first order, so the subtree of the node i
+    occupies the [i, end[i]) slice of every array. All geometric arrays
+    are given at scale=1, length=1 with the number of pieces already applied.
+    '''
+    def __init__(self, obj):
+        #obj is either a volume or an iterable of volumes (e.g. a part)
+        roots = [obj] if hasattr(obj, '_subvolumes') else list(obj)
+        self.name    = getattr(obj, 'name', '')
+        self.volumes = []
+        parent = []
+        depth  = []
+        end    = []
+        stack  = [(v, -1, 0) for v in reversed(roots)]
+        opened = []
+        while stack:
+            v, p, d = stack.pop()
+            #close the subtrees that end before this node
+            while opened and depth[opened[-1]] >= d:
+                end[opened.pop()] = len(self.volumes)
+            i = len(self.volumes)
+            self.volumes.append(v)
+            parent.append(p); depth.append(d); end.append(-1)
+            opened.append(i)
+            stack.extend((sv, i, d+1) for sv in reversed(v._subvolumes))
+        for i in opened: end[i] = len(self.volumes)
+        n = len(self.volumes)
+        self.names  = [v.name for v in self.volumes]
+        self.parent = np.array(parent, dtype=int)
+        self.depth  = np.array(depth, dtype=int)
+        self.end    = np.array(end, dtype=int)
+        self.roots  = np.flatnonzero(self.parent < 0)
+        #node parameters
+        self.V       = np.array([v._V for v in self.volumes])
+        self.pcs     = np.array([v.pcs for v in self.volumes])
+        self.density = np.array([v.d for v in self.volumes])
+        self.cost    = np.array([v._cost for v in self.volumes])
+        surfaces     = [v._surface for v in self.volumes]
+        self.S         = np.array([s._S if s else 0.0 for s in surfaces])
+        self.h         = np.array([s.h if s else 0.0 for s in surfaces])
+        self.S_density = np.array([s.m.density if s else 0.0 for s in surfaces])
+        self.S_cost    = np.array([s.m.cost if s else 0.0 for s in surfaces])
+        self.unit_h    = next((s.unit_h for s in surfaces if s), 1.0)
+        #own volume: full volume minus full volumes of direct children
+        children = self.parent >= 0
+        self.V_own = self.V - np.bincount(self.parent[children],
+                                          weights=self.V[children],
+                                          minlength=n)
+        bad = np.flatnonzero(self.V_own < 0)
+        assert not len(bad), \
+        ("Combined volume of sub-volumes is greater than the volume of '%s'" % self.names[bad[0]])
+        #index pairs for np.add.reduceat over the [i, end[i]) slices
+        self._segments = np.empty(2*n, dtype=int)
+        self._segments[0::2] = np.arange(n)
+        self._segments[1::2] = self.end
+        #all metrics at scale=1, length=1 are the coefficients
+        #of the metrics at any other size
+        unit = {}
+        unit['full_V'] = self.V
+        unit['V']      = self.V_own
+        unit['S']      = self.S
+        unit['full_S'] = self.subtree_sum(self.S)
+        unit['V_cost'] = self.V_own*self.cost
+        unit['S_cost'] = self.S*self.h/self.unit_h*self.S_cost
+        unit['V_mass'] = self.V_own*self.density
+        unit['S_mass'] = self.S*self.h*self.S_density
+        for m in ('V_cost', 'S_cost', 'V_mass', 'S_mass'):
+            unit['full_'+m] = self.subtree_sum(unit[m])
+        self.unit = unit
+    #end def
+
+    def __len__(self): return len(self.volumes)
+
+    def subtree_sum(self, x):
+        '''Sums the per-node values of x (nodes along the last axis) over each subtree'''
+        pad = np.zeros(x.shape[:-1]+(1,))
+        return np.add.reduceat(np.concatenate([x, pad], axis=-1),
+                               self._segments, axis=-1)[...,0::2]
+
+    def evaluate(self, scale=1, length=1):
+        return flat_evaluation(self, scale, length)
+#end class
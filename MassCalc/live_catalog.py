@@ -0,0 +1,332 @@
+'''
+The catalog kept in memory by long-running tools: the parts are built
+on request and rebuilt only when their definitions change.
+
+A part of catalog.py depends on the code of its factory and, through the
+global names the code refers to, on the materials, component classes and
+helpers of catalog.py and components.py. The fingerprint of such a part
+hashes all of them, so after an edit only the parts whose fingerprints
+changed are built again. The parts of a part file are rebuilt with the
+file and are replaced only if their compiled trees changed.
+'''
+import os
+import types
+import fnmatch
+import hashlib
+from collections import OrderedDict
+try: reload
+except NameError: from importlib import reload
+
+import components
+import part_files
+import catalog
+from base_classes import material, interned
+
+
+def source_file(module):
+    filename = os.path.abspath(module.__file__)
+    return filename[:-1] if filename.endswith(('.pyc', '.pyo')) else filename
+#end def
+
+
+def tree_fingerprint(p):
+    '''Hash of everything the numbers of a built part depend on: its parameters and its tree'''
+    t = p.compile()
+    sha1 = hashlib.sha1(repr((p.name, p._size, p._add_mass, p._add_cost, p._res_cost,
+                              t.names)).encode('utf8'))
+    for a in (t.parent, t.V, t.pcs, t.density, t.cost, t.S, t.h, t.S_density, t.S_cost):
+        sha1.update(a.tobytes())
+    return sha1.hexdigest()
+#end def
+
+
+def part_dependencies(p):
+    '''Names of the materials and of the volume types used by a built part'''
+    deps = set()
+    for v in p.compile().volumes:
+        if type(v).__name__ in part_files.component_types: deps.add(type(v).__name__)
+        for m in (v._mat, v._surface.m if v._surface is not None else None):
+            if m is not None and m.name: deps.add(m.name)
+    deps.discard('volume')
+    return deps
+#end def
+
+
+class code_fingerprints(object):
+    '''
+    Fingerprints of the objects defined in the watched modules.
+    The fingerprint of a function covers its code and the fingerprints of the
+    globals it refers to, that of a class covers its attributes and bases,
+    that of a material its values. Objects of other modules are constants.
+    '''
+    def __init__(self, modules, registry=None):
+        self.modules  = set(m.__name__ for m in modules)
+        self.registry = registry
+        self.fps      = {}
+        self.deps     = {}
+
+    def _code(self, code, out, names, consts):
+        out.append(code.co_code)
+        out.append(repr(code.co_names))
+        names.update(code.co_names)
+        for c in code.co_consts:
+            if isinstance(c, types.CodeType): self._code(c, out, names, consts)
+            else:
+                out.append(repr(c))
+                consts.append(c)
+    #end def
+
+    def _function(self, f, out, deps):
+        names, consts = set(), []
+        self._code(f.__code__, out, names, consts)
+        for d in f.__defaults__ or (): out.append(repr(self.value(d, deps)))
+        g = f.__globals__
+        for name in sorted(names):
+            if name not in g: continue
+            if self.registry is not None and g[name] is self.registry:
+                #parts requested from the registry by name, e.g. parts.get('SquarePort')
+                deps.update(c for c in consts if isinstance(c, str) and c in self.registry)
+                continue
+            fp = self.value(g[name], deps, name)
+            if fp is not None: out.append('%s=%s' % (name, fp))
+    #end def
+
+    def value(self, x, deps, name=None):
+        '''
+        Fingerprint of a value; the names of the globals it depends on are added to deps.
+        Returns None for the objects that are neither plain values
+        nor defined in the watched modules.
+        '''
+        if isinstance(x, (bool, int, float, str, type(u''), type(None))): return repr(x)
+        if isinstance(x, material): fp = repr(('material', x.density, x.cost, x.name))
+        elif isinstance(x, (list, tuple)): fp = repr([self.value(i, deps) for i in x])
+        elif isinstance(x, (staticmethod, classmethod)): return self.value(x.__func__, deps)
+        elif isinstance(x, property): return self.value(x.fget, deps)
+        elif isinstance(x, (types.FunctionType, type)) and \
+            getattr(x, '__module__', None) in self.modules:
+            key = id(x)
+            fp  = self.fps.get(key)
+            if fp is None:
+                #a reference to itself is a constant
+                self.fps[key] = x.__name__
+                out, own = [], set()
+                if isinstance(x, type):
+                    for base in x.__bases__:
+                        out.append(self.value(base, own, base.__name__) or base.__name__)
+                    for k in sorted(vars(x)):
+                        if k.startswith('__') and k != '__init__': continue
+                        out.append('%s=%s' % (k, self.value(vars(x)[k], own)))
+                else: self._function(x, out, own)
+                fp = self.fps[key] = hashlib.sha1('\n'.join(out)).hexdigest()
+                self.deps[key] = own
+            deps.update(self.deps.get(key, ()))
+        else: return None
+        if name is not None: deps.add(name)
+        return fp
+    #end def
+
+    def factory(self, f):
+        '''(fingerprint, names of the globals it depends on) of a part factory'''
+        deps = set()
+        fp = self.value(f, deps)
+        deps.discard(f.__name__)
+        return fp, deps
+    #end def
+#end class
+
+
+class live_catalog(object):
+    '''
+    The parts of the catalog and of the part files, built on request.
+    update() reloads the sources that changed on disk and tells which
+    parts changed; only those are built again.
+    '''
+    #modules in the order they are reloaded
+    modules = (components, part_files, catalog)
+
+    def __init__(self, files=(), cache_dir=part_files.default_cache):
+        self.files     = list(files)
+        self.cache_dir = cache_dir
+        self.registry  = catalog.parts
+        self.parts     = {}
+        self.trees     = {}
+        self.error     = None
+        #name -> fingerprint and name -> names of the globals, materials,
+        #volume types and files the part depends on
+        self.fingerprints = {}
+        self.depends      = {}
+        #fingerprints of the globals of the modules, to tell what changed
+        self.globals      = {}
+        self._part_files  = OrderedDict()
+        #name -> names of the parts its factory requested when it was built
+        self.requested    = {}
+        self._load(set(), False)
+        self.mtimes = self._mtimes()
+    #end def
+
+    def sources(self):
+        return ([source_file(m) for m in self.modules]+
+                [os.path.abspath(f) for f in part_files.catalog_files(self.files)])
+    #end def
+
+    def _mtimes(self):
+        mtimes = {}
+        for filename in self.sources():
+            try: mtimes[filename] = os.stat(filename).st_mtime
+            except OSError: mtimes[filename] = None
+        return mtimes
+    #end def
+
+    def _load(self, changed, reload_modules=True):
+        '''
+        Loads the changed sources (and the part files the first time);
+        returns the names of the parts that changed or were added
+        '''
+        code_changed = False
+        if reload_modules and (source_file(components) in changed or
+                               source_file(part_files) in changed):
+            for m in self.modules: reload(m)
+            code_changed = True
+        elif reload_modules and source_file(catalog) in changed:
+            reload(catalog)
+        registry = catalog.parts
+        old_file_parts = set()
+        if registry is self.registry:
+            old_file_parts = set(name for pf in self._part_files.values() for name in pf.parts)
+        fps = code_fingerprints((components, catalog), registry)
+        fingerprints = {}
+        depends = {}
+        for name in registry:
+            if name in old_file_parts: continue
+            fingerprints[name], depends[name] = fps.factory(registry.factory(name))
+        #the part files that changed and, if the code changed, all of them
+        files = OrderedDict()
+        for filename in part_files.catalog_files(self.files):
+            filename = os.path.abspath(filename)
+            pf = self._part_files.get(filename)
+            if pf is None or code_changed or filename in changed:
+                pf = part_files.part_file(filename, self.cache_dir)
+            files[filename] = pf
+            for name, p in pf.parts.items():
+                if name in fingerprints:
+                    raise ValueError('part_registry: %s is already registered' % name)
+                fingerprints[name] = tree_fingerprint(p)
+                depends[name] = part_dependencies(p)|set([filename])
+        #everything is loaded; switch to the new state
+        for name in old_file_parts: registry.unregister(name)
+        for pf in files.values():
+            for name in pf.parts:
+                registry.register(name)(lambda name, parts=pf.parts: parts[name])
+        #the parts the factories requested from the registry when they were built
+        for name in registry:
+            requested = registry.requested(name) or self.requested.get(name, ())
+            depends[name].update(n for n in requested if n in fingerprints)
+        #a part depends on everything the parts it requests depend on
+        grown = True
+        while grown:
+            grown = False
+            for name in registry:
+                for n in list(depends[name]):
+                    if n in depends and not depends[n] <= depends[name]:
+                        depends[name] |= depends[n]
+                        grown = True
+        new = set(name for name in registry if self.fingerprints.get(name) != fingerprints[name])
+        new = [name for name in registry if name in new or depends[name] & new]
+        for name in list(self.parts):
+            if name in new or name not in fingerprints:
+                del self.parts[name]
+                self.trees.pop(name, None)
+        for name in new: registry.forget(name)
+        #the nodes of the replaced parts are dropped, so reloads do not grow the memory
+        if new:
+            kept = list(self.parts.values())+[p for pf in files.values() for p in pf.parts.values()]
+            interned.prune(v for p in kept for v in p)
+        self.registry     = registry
+        self._part_files  = files
+        self.fingerprints = fingerprints
+        self.depends      = depends
+        self.globals      = self._globals(fps)
+        return new
+    #end def
+
+    @staticmethod
+    def _globals(fps):
+        '''{name: (fingerprint, names it depends on)} of the globals of the modules'''
+        g = {}
+        for m in (components, catalog):
+            for name, x in vars(m).items():
+                if name.startswith('__'): continue
+                deps = set()
+                fp = fps.value(x, deps)
+                deps.discard(name)
+                if fp is not None: g[name] = (fp, deps)
+        return g
+    #end def
+
+    def update(self):
+        '''
+        Reloads the sources changed since the last update. Returns the lists of
+        the changed (or added) parts, of the removed parts and of the globals
+        (materials, components, factories...) that were changed, added or removed.
+        If the sources cannot be loaded, the error is kept in self.error
+        and the catalog stays as it was.
+        '''
+        mtimes = self._mtimes()
+        if mtimes == self.mtimes: return [], [], []
+        changed = set(f for f in mtimes if mtimes[f] != self.mtimes.get(f))
+        self.mtimes = mtimes
+        old_names   = set(self.fingerprints)
+        old_globals = self.globals
+        try: new = self._load(changed)
+        except Exception as e:
+            self.error = '%s: %s' % (e.__class__.__name__, e)
+            return [], [], []
+        self.error = None
+        changed_globals = set(name for name in set(old_globals)|set(self.globals)
+                              if old_globals.get(name, (None,))[0] !=
+                              self.globals.get(name, (None,))[0])
+        #only the globals changed by themselves, not through the others
+        changed_globals = sorted(name for name in changed_globals
+                                 if not self.globals.get(name, (None, ()))[1] & changed_globals)
+        return new, sorted(old_names-set(self.fingerprints)), changed_globals
+    #end def
+
+    def names(self, patterns=None):
+        '''The names matching any of the glob patterns, in the catalog order'''
+        if not patterns: return list(self.registry)
+        return [n for n in self.registry
+                if any(n == p or fnmatch.fnmatchcase(n, p) for p in patterns)]
+    #end def
+
+    def dependents(self, name):
+        '''Names of the parts that depend on the global (material, component...) or file'''
+        return [n for n in self.registry if name in self.depends.get(n, ())]
+
+    def __contains__(self, name): return name in self.fingerprints
+
+    def __iter__(self): return iter(self.registry)
+
+    def get(self, name):
+        p = self.parts.get(name)
+        if p is None:
+            p = self.parts[name] = self.registry.get(name)
+            self.remember_requests()
+        return p
+    #end def
+
+    def remember_requests(self):
+        '''
+        Keeps the names of the parts requested by the factories run so far,
+        so the dependents of a part are rebuilt with it even after a reload
+        '''
+        for name in self.registry:
+            requested = self.registry.requested(name)
+            if requested: self.requested[name] = set(requested)
+    #end def
+
+    def tree(self, name):
+        t = self.trees.get(name)
+        if t is None: t = self.trees[name] = self.get(name).compile()
+        return t
+    #end def
+#end class
@@ -0,0 +1,434 @@
+'''
+Reader of the Unity model files (*.mu) used by KSP and measurement
+of the meshes in them: enclosed volume and surface area of every mesh
+in the coordinates of the model, computed with NumPy.
+
+Only the geometry is extracted; the rest of the entries are skipped.
+The file is memory-mapped and vertex and triangle arrays are read
+directly from the map without copying.
+'''
+import os
+import sys
+import mmap
+import struct
+import fnmatch
+
+import numpy as np
+
+from confignode import file_hash
+try: import cPickle as pickle
+except ImportError: import pickle
+
+
+MODEL_BINARY = 76543
+
+#entry types
+ET_CHILD_TRANSFORM_START = 0
+ET_CHILD_TRANSFORM_END   = 1
+ET_ANIMATION             = 2
+ET_MESH_COLLIDER         = 3
+ET_SPHERE_COLLIDER       = 4
+ET_CAPSULE_COLLIDER      = 5
+ET_BOX_COLLIDER          = 6
+ET_MESH_FILTER           = 7
+ET_MESH_RENDERER         = 8
+ET_SKINNED_MESH_RENDERER = 9
+ET_MATERIALS             = 10
+ET_MATERIAL              = 11
+ET_TEXTURES              = 12
+ET_MESH_START            = 13
+ET_MESH_VERTS            = 14
+ET_MESH_UV               = 15
+ET_MESH_UV2              = 16
+ET_MESH_NORMALS          = 17
+ET_MESH_TANGENTS         = 18
+ET_MESH_TRIANGLES        = 19
+ET_MESH_BONE_WEIGHTS     = 20
+ET_MESH_BIND_POSES       = 21
+ET_MESH_END              = 22
+ET_LIGHT                 = 23
+ET_TAG_AND_LAYER         = 24
+ET_MESH_COLLIDER2        = 25
+ET_SPHERE_COLLIDER2      = 26
+ET_CAPSULE_COLLIDER2     = 27
+ET_BOX_COLLIDER2         = 28
+ET_WHEEL_COLLIDER        = 29
+ET_CAMERA                = 30
+ET_PARTICLES             = 31
+ET_MESH_VERTEX_COLORS    = 32
+
+#sizes of the fixed-size entries in bytes
+_fixed_entries = {ET_SPHERE_COLLIDER:   4+12,
+                  ET_CAPSULE_COLLIDER:  4+4+4+12,
+                  ET_BOX_COLLIDER:      12+12,
+                  ET_SPHERE_COLLIDER2:  1+4+12,
+                  ET_CAPSULE_COLLIDER2: 1+4+4+4+12,
+                  ET_BOX_COLLIDER2:     1+12+12,
+                  #mass, radius, suspension distance, center, spring (3), 2 frictions (5 each)
+                  ET_WHEEL_COLLIDER:    4*3+12+4*3+4*5*2,
+                  ET_CAMERA:            4+16+4+1+4*4,
+                  ET_PARTICLES:         290}
+
+#bytes per vertex of the per-vertex mesh arrays
+_vertex_arrays = {ET_MESH_UV:            8,
+                  ET_MESH_UV2:           8,
+                  ET_MESH_NORMALS:       12,
+                  ET_MESH_TANGENTS:      16,
+                  ET_MESH_BONE_WEIGHTS:  32,
+                  ET_MESH_VERTEX_COLORS: 4}
+
+
+class MuError(Exception):
+    def __init__(self, filename, offset, message):
+        Exception.__init__(self, '%s@%d: %s' % (filename, offset, message))
+        self.filename = filename
+        self.offset   = offset
+#end class
+
+
+class mu_mesh(object):
+    '''
+    Vertices (n, 3) and triangles (m, 3) of a mesh in the coordinates of its transform;
+    kind is 'mesh' for rendered meshes and 'collider' for mesh colliders.
+    '''
+    def __init__(self, verts, triangles, kind='mesh'):
+        self.verts     = verts
+        self.triangles = triangles
+        self.kind      = kind
+#end class
+
+
+class mu_transform(object):
+    def __init__(self, name, position, rotation, scale):
+        self.name     = name
+        self.position = position
+        self.rotation = rotation #x, y, z, w
+        self.scale    = scale
+        self.tag      = None
+        self.layer    = None
+        self.meshes   = []
+        self.children = []
+
+    @property
+    def matrix(self):
+        '''Local transformation matrix: translation * rotation * scale'''
+        x, y, z, w = self.rotation
+        n = x*x+y*y+z*z+w*w
+        s = 2.0/n if n else 0.0
+        R = np.array([[1-s*(y*y+z*z), s*(x*y-z*w),   s*(x*z+y*w)],
+                      [s*(x*y+z*w),   1-s*(x*x+z*z), s*(y*z-x*w)],
+                      [s*(x*z-y*w),   s*(y*z+x*w),   1-s*(x*x+y*y)]])
+        M = np.identity(4)
+        M[:3,:3] = R*np.asarray(self.scale)
+        M[:3,3]  = self.position
+        return M
+    #end def
+
+    def walk(self, matrix=None, path=''):
+        '''Yields (path, transform, world matrix); the root transform itself is not applied'''
+        path = path+'/'+self.name if path else self.name
+        M = np.identity(4) if matrix is None else matrix.dot(self.matrix)
+        yield path, self, M
+        for c in self.children:
+            for t in c.walk(M, path): yield t
+    #end def
+#end class
+
+
+class mu_reader(object):
+    def __init__(self, buf, filename='<buffer>'):
+        self.buf      = buf
+        self.filename = filename
+        self.pos      = 0
+        self.version  = 0
+
+    def error(self, message): return MuError(self.filename, self.pos, message)
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        if self.pos+size > len(self.buf): raise self.error('unexpected end of file')
+        values = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += size
+        return values
+    #end def
+
+    def int(self): return self.unpack('<i')[0]
+
+    def skip(self, size):
+        if size < 0 or self.pos+size > len(self.buf): raise self.error('unexpected end of file')
+        self.pos += size
+
+    def array(self, dtype, count):
+        '''Zero-copy view of count items of the dtype at the current position'''
+        size = np.dtype(dtype).itemsize*count
+        if count < 0 or self.pos+size > len(self.buf): raise self.error('bad array size')
+        a = np.frombuffer(self.buf, dtype=dtype, count=count, offset=self.pos)
+        self.pos += size
+        return a
+    #end def
+
+    def string(self):
+        '''.NET string: length as 7-bit encoded integer followed by UTF-8 bytes'''
+        length = shift = 0
+        while True:
+            b = self.unpack('<B')[0]
+            length |= (b & 0x7f) << shift
+            shift += 7
+            if not b & 0x80: break
+        if self.pos+length > len(self.buf): raise self.error('unexpected end of file')
+        s = self.buf[self.pos:self.pos+length]
+        self.pos += length
+        return s.decode('utf-8')
+    #end def
+
+    def read(self):
+        magic, self.version = self.unpack('<ii')
+        if magic != MODEL_BINARY: raise self.error('not a .mu file')
+        name = self.string()
+        return self.read_object()
+    #end def
+
+    def read_object(self):
+        t = mu_transform(self.string(), self.unpack('<3f'), self.unpack('<4f'), self.unpack('<3f'))
+        while self.pos < len(self.buf):
+            entry = self.int()
+            if entry == ET_CHILD_TRANSFORM_START:
+                t.children.append(self.read_object())
+            elif entry == ET_CHILD_TRANSFORM_END:
+                break
+            elif entry == ET_TAG_AND_LAYER:
+                t.tag   = self.string()
+                t.layer = self.int()
+            elif entry == ET_MESH_FILTER:
+                t.meshes.append(self.read_mesh('mesh'))
+            elif entry == ET_MESH_COLLIDER:
+                self.skip(1)
+                t.meshes.append(self.read_mesh('collider'))
+            elif entry == ET_MESH_COLLIDER2:
+                self.skip(2)
+                t.meshes.append(self.read_mesh('collider'))
+            elif entry in _fixed_entries:
+                self.skip(_fixed_entries[entry])
+            elif entry == ET_MESH_RENDERER:
+                if self.version > 0: self.skip(2)
+                self.skip(4*self.int())
+            elif entry == ET_SKINNED_MESH_RENDERER:
+                self.skip(4*self.int())
+                self.skip(12+12+4+1)
+                for i in range(self.int()): self.string()
+                t.meshes.append(self.read_mesh('mesh'))
+            elif entry == ET_ANIMATION:
+                self.skip_animation()
+            elif entry == ET_LIGHT:
+                self.skip(4+4+4+16+4+(4 if self.version > 1 else 0))
+            elif entry in (ET_MATERIALS, ET_TEXTURES):
+                #materials and textures are written last; nothing geometric follows
+                self.pos = len(self.buf)
+            else:
+                raise self.error('unsupported entry type %d' % entry)
+        return t
+    #end def
+
+    def read_mesh(self, kind):
+        if self.int() != ET_MESH_START: raise self.error('mesh expected')
+        nverts, nsubmeshes = self.unpack('<ii')
+        verts = None
+        triangles = []
+        while True:
+            entry = self.int()
+            if entry == ET_MESH_END: break
+            elif entry == ET_MESH_VERTS:
+                verts = self.array('<f4', nverts*3).reshape(nverts, 3)
+            elif entry == ET_MESH_TRIANGLES:
+                triangles.append(self.array('<i4', self.int()).reshape(-1, 3))
+            elif entry in _vertex_arrays:
+                self.skip(_vertex_arrays[entry]*nverts)
+            elif entry == ET_MESH_BIND_POSES:
+                self.skip(64*self.int())
+            else:
+                raise self.error('unsupported mesh entry type %d' % entry)
+        if verts is None: verts = np.zeros((0, 3), dtype='<f4')
+        triangles = np.concatenate(triangles) if triangles else np.zeros((0, 3), dtype='<i4')
+        return mu_mesh(verts, triangles, kind)
+    #end def
+
+    def skip_animation(self):
+        for clip in range(self.int()):
+            self.string()
+            self.skip(12+12+4)
+            for curve in range(self.int()):
+                self.string()
+                self.string()
+                self.skip(4+4+4)
+                self.skip(20*self.int())
+        self.string()
+        self.skip(1)
+    #end def
+#end class
+
+
+def mesh_geometry(verts, triangles, matrix=None):
+    '''
+    Returns (volume, area) of the triangle mesh: the sum of the signed volumes
+    of the tetrahedra formed by each triangle and the origin, and the sum of
+    the triangle areas. The volume is that enclosed by the mesh if it is closed;
+    it is positive if the faces point outwards.
+    '''
+    v = np.asarray(verts, dtype=float)
+    sign = 1.0
+    if matrix is not None:
+        v = v.dot(matrix[:3,:3].T)+matrix[:3,3]
+        if np.linalg.det(matrix[:3,:3]) < 0: sign = -1.0
+    a, b, c = v[triangles[:,0]], v[triangles[:,1]], v[triangles[:,2]]
+    cross  = np.cross(b-a, c-a)
+    volume = sign*np.einsum('ij,ij->', a, np.cross(b, c))/6.0
+    area   = 0.5*np.sqrt(np.einsum('ij,ij->i', cross, cross)).sum()
+    return volume, area
+#end def
+
+
+def is_closed(verts, triangles):
+    '''True if every edge of the mesh is shared by exactly two triangles; coincident vertices are merged'''
+    if not len(triangles): return False
+    index = np.unique(verts, axis=0, return_inverse=True)[1]
+    t = index[triangles]
+    edges = np.sort(np.concatenate([t[:,[0,1]], t[:,[1,2]], t[:,[2,0]]]), axis=1)
+    counts = np.unique(edges, axis=0, return_counts=True)[1]
+    return bool((counts == 2).all())
+#end def
+
+
+class mesh_measure(object):
+    '''Volume and area of a mesh; the volume is meaningful only for closed meshes'''
+    def __init__(self, path, kind, volume, area, triangles, closed):
+        self.path      = path
+        self.kind      = kind
+        self.volume    = volume
+        self.area      = area
+        self.triangles = triangles
+        self.closed    = closed
+
+    def __repr__(self):
+        return '%s %s: V = %.6g, S = %.6g%s' % (self.kind, self.path, self.volume, self.area,
+                                                '' if self.closed else ' (open)')
+#end class
+
+
+def measure(filename):
+    '''Measures every mesh of the model; returns the list of mesh_measure in file order'''
+    with open(filename, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            root = mu_reader(buf, filename).read()
+            measures = []
+            for path, t, M in root.walk():
+                for m in t.meshes:
+                    volume, area = mesh_geometry(m.verts, m.triangles, M)
+                    measures.append(mesh_measure(path, m.kind, volume, area, len(m.triangles),
+                                                 is_closed(m.verts, m.triangles)))
+        finally:
+            #the arrays of the meshes are views of the map, which cannot be closed
+            #while they exist (Python 3 raises BufferError); if an error keeps some
+            #of them in its traceback, the map is closed when it is collected
+            root = t = m = None
+            try: buf.close()
+            except BufferError: pass
+    return measures
+#end def
+
+
+class measure_cache(object):
+    '''
+    On-disk cache of the measures of model files keyed by the hash of their content,
+    so only new or changed models are read again.
+    '''
+    cache_version = 1
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self.measures   = {}
+        self.measured   = 0
+        self.dirty      = False
+        if not cache_file or not os.path.isfile(cache_file): return
+        try:
+            with open(cache_file, 'rb') as f:
+                version, measures = pickle.load(f)
+        except Exception:
+            return
+        if version == self.cache_version: self.measures = measures
+    #end def
+
+    def get(self, filename):
+        sha1 = file_hash(filename)
+        measures = self.measures.get(sha1)
+        if measures is None:
+            measures = self.measures[sha1] = measure(filename)
+            self.measured += 1
+            self.dirty = True
+        return measures
+    #end def
+
+    def save(self):
+        if not self.cache_file or not self.dirty: return
+        tmp = self.cache_file+'.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump((self.cache_version, self.measures), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, self.cache_file)
+        self.dirty = False
+    #end def
+#end class
+
+
+default_cache  = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.mu-measure.cache')
+default_models = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                              'GameData', 'Hangar', 'Parts', 'Models')
+
+
+def model_files(paths):
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for fn in sorted(fnmatch.filter(filenames, '*.mu')):
+                yield os.path.join(dirpath, fn)
+#end def
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Measure volume and surface area '
+                                     'of the meshes of .mu models')
+    parser.add_argument('paths', nargs='*', default=[default_models], metavar='PATH',
+                        help='model files or directories (default: %s)' %
+                        os.path.relpath(default_models))
+    parser.add_argument('-m', '--mesh', action='append', metavar='NAME',
+                        help='show only the meshes whose transform name matches NAME (glob)')
+    parser.add_argument('-c', '--colliders', action='store_true',
+                        help='show mesh colliders as well')
+    parser.add_argument('--cache', default=default_cache, metavar='FILE')
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+    cache = measure_cache(None if args.no_cache else args.cache)
+    total = failed = 0
+    for filename in model_files(args.paths):
+        total += 1
+        try: measures = cache.get(filename)
+        except (MuError, IOError) as e:
+            sys.stderr.write('%s\n' % e)
+            failed += 1
+            continue
+        measures = [m for m in measures if
+                    (args.colliders or m.kind == 'mesh') and
+                    (not args.mesh or any(fnmatch.fnmatchcase(m.path.rsplit('/', 1)[-1], p)
+                                          for p in args.mesh))]
+        if not measures: continue
+        print('%s:' % os.path.basename(filename))
+        for m in measures:
+            print('    %-9s %12.6f %12.6f %7d %s  %s' %
+                  (m.kind, m.volume, m.area, m.triangles,
+                   'closed' if m.closed else 'open  ', m.path))
+    cache.save()
+    sys.stderr.write('%d model(s), %d measured, %d failed\n' % (total, cache.measured, failed))
+    if failed: sys.exit(1)
@@ -0,0 +1,94 @@
+'''
+Evaluation of catalog parts in a pool of worker processes.
+Workers build the parts from the registry by name and send back
+the built part together with its report, so the results are
+identical to the sequential evaluation and come in the same order.
+The parts of the part files are registered again in the workers
+that do not inherit the registry (spawn, as on Windows).
+'''
+from multiprocessing import Pool
+
+import numpy as np
+
+from base_classes import format_data
+from catalog import parts
+from part_files import register_files, default_cache
+
+
+def parse_range(text):
+    '''Parses FROM:TO:STEP (inclusive) or a comma separated list of numbers'''
+    if ':' in text:
+        start, stop, step = (float(x) for x in text.split(':'))
+        return np.arange(start, stop+step/2.0, step)
+    return np.array([float(x) for x in text.split(',')])
+#end def
+
+
+def sweep_lines(p, scales, lengths=None):
+    t = p.sweep(scales, 1 if lengths is None else lengths)
+    data = format_data(t.scale.ravel(), [t.length.ravel(), t.mass.ravel(),
+                                         t.cost.ravel(), t.entry_cost.ravel()])
+    yield '//scale : length : mass : cost : entryCost'
+    for line in data.splitlines(): yield '//'+line
+#end def
+
+
+def breakdown_lines(p, scales, lengths=None):
+    '''Full mass and cost of every node of the part at the sizes of the sweep table'''
+    s, l = np.meshgrid(scales, 1 if lengths is None else lengths, indexing='ij')
+    t  = p.compile()
+    ev = t.evaluate(s.ravel()/p._size, l.ravel())
+    names = ['   '*d+name for d, name in zip(t.depth, t.names)]
+    for metric, title in (('full_mass', 'mass, t'), ('full_cost', 'cost, Cr')):
+        yield '//node %s at the sizes above' % title
+        data = format_data(names, list(getattr(ev, metric)))
+        for line in data.splitlines(): yield '//'+line
+#end def
+
+
+def part_lines(p, scales=None, lengths=None, breakdown=False):
+    '''The report of the part with the sweep table (if any) and its breakdown (if requested)'''
+    lines = list(p.lines())
+    if scales is not None:
+        lines.extend(sweep_lines(p, scales, lengths))
+        if breakdown: lines.extend(breakdown_lines(p, scales, lengths))
+    return lines
+#end def
+
+
+def evaluate_part(task):
+    '''Builds the part and generates its report (if requested)'''
+    name, report, scales, lengths, breakdown = task
+    p = parts.get(name)
+    return p, part_lines(p, scales, lengths, breakdown) if report else []
+#end def
+
+
+def init_worker(names, files, cache_dir):
+    '''Registers the parts of the part files, unless the worker inherited them by fork'''
+    if files and not all(name in parts for name in names):
+        register_files(parts, files, cache_dir)
+#end def
+
+
+def evaluate_parts(names, jobs=1, report=True, scales=None, lengths=None, chunksize=1,
+                   breakdown=False, part_files=(), cache_dir=default_cache):
+    '''
+    Generates (part, report lines) for the named parts in the order of names.
+    With jobs > 1 the parts are evaluated by a pool of jobs processes;
+    part_files are the files (and directories) the parts of which
+    were registered, with their cache_dir.
+    '''
+    tasks = [(name, report, scales, lengths, breakdown) for name in names]
+    if jobs == 1 or len(tasks) < 2:
+        for t in tasks: yield evaluate_part(t)
+        return
+    pool = Pool(min(jobs, len(tasks)), init_worker, (list(names), list(part_files), cache_dir))
+    try:
+        for result in pool.imap(evaluate_part, tasks, chunksize):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+#end def
@@ -0,0 +1,364 @@
+'''
+Declarative part catalogs: parts described in JSON files and built
+into the volume/part classes, with a compiled cache of the built parts.
+
+A file has two sections, both optional:
+
+    {"materials": {"NAME": {"density": 2.7, "cost": 8}, ...},
+     "parts": {"NAME": {"size": 2, "add_mass": 0, "add_cost": 200, "res_cost": 0,
+                        "volumes": [NODE, ...]}, ...}}
+
+A NODE mirrors the constructor of its type ("volume" by default):
+
+    {"name": "hull", "volume": 9.4, "C": 1, "D": 0.02, "N": 1,
+     "S": [66.444, 0.004, "Al_Li"], "V": [NODE, ...]}
+    {"name": "hinges", "volume": 0.002, "N": 8, "material": "aluminium"}
+    {"type": "battery", "E": 2000}
+    {"type": "solar_panel", "args": [2.413]}
+
+Materials are referred to by name (the file's own or those of the components
+module) or given inline as [density, cost]. The built parts are pickled next
+to a hash of the file and of the code that builds them, so a warm start
+neither parses the file nor constructs the trees.
+'''
+import os
+import sys
+import json
+import hashlib
+from collections import OrderedDict
+try: import cPickle as pickle
+except ImportError: import pickle
+
+import numpy as np
+
+import components
+from base_classes import material, surface, volume, part
+from confignode import file_hash
+
+
+class PartFileError(Exception):
+    def __init__(self, filename, message):
+        Exception.__init__(self, '%s: %s' % (filename, message))
+        self.filename = filename
+#end class
+
+
+def _str(s):
+    return s if isinstance(s, str) else s.encode('utf8')
+
+
+#volume types that may be used in the files
+component_types = dict((name, cls) for name, cls in vars(components).items()
+                       if isinstance(cls, type) and issubclass(cls, volume)
+                       and not name.startswith('_'))
+
+
+def shared_materials():
+    '''
+    Materials defined in the code: the named materials of the components module
+    and those of the component types. They are stored in the cache by name,
+    so the parts loaded from the cache share them with the rest of the catalog.
+    '''
+    mats = components.named_materials()
+    for cls in component_types.values():
+        m = getattr(cls, '_material', None)
+        if isinstance(m, material) and m.name: mats.setdefault(m.name, m)
+    return mats
+#end def
+
+
+def code_hash():
+    '''Hash of the modules that build the parts; the cache is invalidated when they change'''
+    sha1 = hashlib.sha1()
+    for m in ('base_classes', 'components', 'part_files'):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), m+'.py'), 'rb') as f:
+            sha1.update(f.read())
+    return sha1.hexdigest()
+#end def
+
+
+class part_builder(object):
+    '''Builds the parts of a parsed file'''
+    def __init__(self, filename, materials=None):
+        self.filename  = filename
+        self.materials = shared_materials() if materials is None else dict(materials)
+
+    def error(self, message): return PartFileError(self.filename, message)
+
+    def material(self, spec, name=None):
+        if isinstance(spec, (str, type(u''))):
+            m = self.materials.get(_str(spec))
+            if m is None: raise self.error('unknown material: %s' % spec)
+            return m
+        try:
+            if isinstance(spec, dict): return material(spec['density'], spec['cost'], name)
+            density, cost = spec
+            return material(density, cost, name)
+        except (KeyError, TypeError, ValueError):
+            raise self.error('a material should be a name, [density, cost] '
+                             'or {"density": ..., "cost": ...}: %s' % (spec,))
+    #end def
+
+    def surface(self, spec, path):
+        try:
+            if isinstance(spec, dict): S, h, m = spec['S'], spec['h'], spec['material']
+            else: S, h, m = spec
+        except (KeyError, TypeError, ValueError):
+            raise self.error('%s: a surface should be [S, h, material] '
+                             'or {"S": ..., "h": ..., "material": ...}: %s' % (path, spec))
+        return surface(S, h, self.material(m))
+    #end def
+
+    def node(self, spec, path):
+        '''
+        The volume of the spec; path (e.g. parts/Name/volumes/0/V/1)
+        tells where it is in the file in the error messages.
+        '''
+        if not isinstance(spec, dict): raise self.error('%s: a volume should be an object' % path)
+        spec = dict(spec)
+        kind = _str(spec.pop('type', 'volume'))
+        cls  = component_types.get(kind)
+        if cls is None: raise self.error('%s: unknown volume type: %s' % (path, kind))
+        args = list(spec.pop('args', []))
+        if cls is volume:
+            try: args = [spec.pop('volume'), _str(spec.pop('name'))]+args
+            except KeyError as e: raise self.error('%s: a volume needs %s: %s' % (path, e, spec))
+        kwargs = {}
+        for k, v in spec.items():
+            k = _str(k)
+            if k == 'S' and isinstance(v, (list, dict)): v = self.surface(v, '%s/S' % path)
+            elif k == 'V' and isinstance(v, list):
+                v = [self.node(sv, '%s/V/%d' % (path, i)) for i, sv in enumerate(v)]
+            elif k == 'material': v = self.material(v)
+            elif isinstance(v, type(u'')): v = _str(v)
+            kwargs[k] = v
+        #the volumes check their parameters with assertions and arithmetic
+        try: return cls(*args, **kwargs)
+        except (AssertionError, ArithmeticError, AttributeError, KeyError, TypeError, ValueError) as e:
+            raise self.error('%s: %s' % (path, str(e) or e.__class__.__name__))
+    #end def
+
+    def part(self, name, spec):
+        path = 'parts/%s' % name
+        if not isinstance(spec, dict): raise self.error('%s: a part should be an object' % path)
+        spec = dict(spec)
+        vols = [self.node(v, '%s/volumes/%d' % (path, i))
+                for i, v in enumerate(spec.pop('volumes', []))]
+        if not vols: raise self.error('%s has no volumes' % name)
+        unknown = set(spec)-set(('size', 'add_mass', 'add_cost', 'res_cost'))
+        if unknown: raise self.error('%s: unknown keys %s' % (name, ', '.join(sorted(unknown))))
+        kwargs = dict((_str(k), v) for k, v in spec.items())
+        try:
+            #the weights of the part are its masses and costs divided by the totals
+            evals = [v.evaluate() for v in vols]
+            if not sum(ev.full_mass for ev in evals)+kwargs.get('add_mass', 0) > 0:
+                raise self.error('%s: the part has no mass' % name)
+            if not sum(ev.full_cost for ev in evals)+kwargs.get('add_cost', 0) > 0:
+                raise self.error('%s: the part has no cost' % name)
+            return part(_str(name), vols, **kwargs)
+        except (AssertionError, ArithmeticError, AttributeError, KeyError, TypeError, ValueError) as e:
+            raise self.error('%s: %s' % (path, str(e) or e.__class__.__name__))
+    #end def
+
+    def build(self, data):
+        '''OrderedDict of the parts built from the parsed data'''
+        for name, spec in data.get('materials', {}).items():
+            self.materials[_str(name)] = self.material(spec, _str(name))
+        return OrderedDict((_str(name), self.part(name, spec))
+                           for name, spec in data.get('parts', {}).items())
+    #end def
+#end class
+
+
+def parse(filename):
+    with open(filename) as f:
+        try: return json.load(f, object_pairs_hook=OrderedDict)
+        except ValueError as e: raise PartFileError(filename, e)
+#end def
+
+
+class part_file(object):
+    '''
+    The parts of a file, built or loaded from the cache. The cache file
+    of a part file depends only on its path, so it is overwritten
+    whenever the file changes.
+    '''
+    cache_version = 1
+
+    def __init__(self, filename, cache_dir=None):
+        self.filename = os.path.abspath(filename)
+        self.sha1     = file_hash(self.filename)
+        self.cached   = False
+        key = (self.cache_version, self.sha1, code_hash())
+        cache_file = None
+        if cache_dir:
+            cache_file = os.path.join(cache_dir, '%s.pickle' %
+                                      hashlib.sha1(self.filename.encode('utf8')).hexdigest())
+            self.parts = self._load_cache(cache_file, key)
+            if self.parts is not None:
+                self.cached = True
+                return
+        self.parts = part_builder(self.filename).build(parse(self.filename))
+        if cache_file: self._save_cache(cache_file, key)
+    #end def
+
+    @staticmethod
+    def _load_cache(cache_file, key):
+        if not os.path.isfile(cache_file): return None
+        mats = shared_materials()
+        try:
+            with open(cache_file, 'rb') as f:
+                u = pickle.Unpickler(f)
+                u.persistent_load = mats.__getitem__
+                if u.load() != key: return None
+                return u.load()
+        except Exception:
+            return None
+    #end def
+
+    def _save_cache(self, cache_file, key):
+        shared = dict((id(m), name) for name, m in shared_materials().items())
+        if not os.path.isdir(os.path.dirname(cache_file)):
+            os.makedirs(os.path.dirname(cache_file))
+        tmp = cache_file+'.tmp'
+        with open(tmp, 'wb') as f:
+            p = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+            p.persistent_id = lambda obj: shared.get(id(obj)) if isinstance(obj, material) else None
+            p.dump(key)
+            p.dump(self.parts)
+        os.rename(tmp, cache_file)
+    #end def
+#end class
+
+
+default_cache = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.part-files.cache')
+
+
+def catalog_files(paths):
+    '''The given files and the *.json files of the given directories'''
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for fn in sorted(filenames):
+                if fn.endswith('.json'): yield os.path.join(dirpath, fn)
+#end def
+
+
+def register_files(registry, paths, cache_dir=default_cache):
+    '''
+    Registers the parts of the files in the registry;
+    returns the list of part_files. Raises ValueError if a name is taken,
+    in which case nothing is registered.
+    '''
+    files = [part_file(filename, cache_dir) for filename in catalog_files(paths)]
+    names = [name for pf in files for name in pf.parts]
+    for i, name in enumerate(names):
+        if name in registry or name in names[:i]:
+            raise ValueError('part_registry: %s is already registered' % name)
+    for pf in files:
+        for name in pf.parts:
+            registry.register(name)(lambda name, parts=pf.parts: parts[name])
+    return files
+#end def
+
+
+#description of the built parts in the same format
+
+def _material_spec(m, names):
+    return m.name if names.get(m.name) is m else [m.density, m.cost]
+
+def _value(key, names):
+    '''Value of a construction parameter from its intern key'''
+    if isinstance(key, (surface, volume)): return describe_node(key, names)
+    if not isinstance(key, tuple): return key
+    if key and isinstance(key[0], type):
+        kind, x = key
+        if kind is dict: return _kwargs(x, names)
+        if isinstance(x, material): return _material_spec(x, names)
+        if isinstance(x, np.generic): return x.item()
+        return x
+    return [_value(k, names) for k in key]
+#end def
+
+def _kwargs(key, names):
+    return OrderedDict((k, _value(v, names)) for k, v in zip(key[0::2], key[1::2]))
+
+
+def describe_node(node, names):
+    '''
+    The NODE of a surface or volume from its construction parameters,
+    which are known only if the node is interned.
+    '''
+    if node._key is None or node._key[0] == 'pcs':
+        raise ValueError('the parameters of %s are unknown' % getattr(node, 'name', 'a surface'))
+    cls, args, kwargs = node._key
+    args   = _value(args, names)
+    kwargs = _kwargs(kwargs, names)
+    if cls is surface: return args
+    spec = OrderedDict()
+    if cls is volume:
+        spec['name']   = args[1]
+        spec['volume'] = args[0]
+        args = args[2:]
+    else: spec['type'] = next(k for k, c in component_types.items() if c is cls)
+    if args: spec['args'] = args
+    #surface and subvolumes go last
+    for k in sorted(kwargs, key=lambda k: (k in ('S', 'V'), k)): spec[k] = kwargs[k]
+    return spec
+#end def
+
+
+def describe(parts):
+    '''The file content (without the materials section) describing the parts'''
+    names = shared_materials()
+    out = OrderedDict()
+    for p in parts:
+        spec = OrderedDict()
+        for k in ('size', 'add_mass', 'add_cost', 'res_cost'):
+            x = getattr(p, '_'+k)
+            if x != (1 if k == 'size' else 0): spec[k] = x
+        spec['volumes'] = [describe_node(v, names) for v in p]
+        out[p.name] = spec
+    return OrderedDict([('parts', out)])
+#end def
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    from catalog import parts
+    parser = argparse.ArgumentParser(description='Load declarative part files, or describe '
+                                     'the parts of the catalog in this format')
+    parser.add_argument('files', nargs='*', metavar='FILE',
+                        help='part files or directories with *.json part files to load')
+    parser.add_argument('--describe', action='store_true',
+                        help='write the description of the catalog parts to stdout')
+    parser.add_argument('-p', '--part', action='append', metavar='NAME',
+                        help='describe only the parts matching NAME (glob); may be repeated')
+    parser.add_argument('--cache', default=default_cache, metavar='DIR',
+                        help='directory of the compiled cache (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the compiled cache')
+    args = parser.parse_args()
+    if args.describe:
+        try: names = parts.names(args.part)
+        except KeyError as e: parser.error('no part matches %s' % e)
+        try: data = describe(parts.build(names))
+        except ValueError as e: parser.error(str(e))
+        json.dump(data, sys.stdout, indent=1, separators=(',', ': '))
+        sys.stdout.write('\n')
+        sys.exit()
+    if not args.files: parser.error('no files given')
+    for filename in catalog_files(args.files):
+        start = time.time()
+        try: pf = part_file(filename, None if args.no_cache else args.cache)
+        except (PartFileError, IOError) as e:
+            sys.stderr.write('%s\n' % e)
+            continue
+        print('%s: %d part(s) %s in %.3fs' % (filename, len(pf.parts),
+                                               'loaded from the cache' if pf.cached else 'built',
+                                               time.time()-start))
+        for name in pf.parts: print('    %s' % name)
@@ -0,0 +1,82 @@
+import fnmatch
+from collections import OrderedDict
+
+
+class part_registry(object):
+    '''
+    An ordered collection of named part factories.
+    Parts are built on first request and cached afterwards.
+    '''
+    def __init__(self):
+        self._factories = OrderedDict()
+        self._parts     = {}
+        #names of the parts each factory requested from the registry
+        self._requested = {}
+        self._building  = []
+
+    def register(self, name):
+        '''Decorator that registers factory(name) -> part under the given name'''
+        def decorator(factory):
+            if name in self._factories:
+                raise ValueError('part_registry: %s is already registered' % name)
+            self._factories[name] = factory
+            return factory
+        return decorator
+    #end def
+
+    def factory(self, name): return self._factories[name]
+
+    def unregister(self, name):
+        '''Removes the part and its factory, if any'''
+        self._factories.pop(name, None)
+        self._parts.pop(name, None)
+        self._requested.pop(name, None)
+    #end def
+
+    def __contains__(self, name): return name in self._factories
+
+    def __iter__(self): return iter(self._factories)
+
+    def __len__(self): return len(self._factories)
+
+    def names(self, patterns=None):
+        '''
+        Returns the names that match any of the glob patterns in registration order.
+        An exact name always matches itself, even if it contains glob characters.
+        Raises KeyError if some pattern matches nothing.
+        '''
+        if not patterns: return list(self._factories)
+        selected = set()
+        for p in patterns:
+            matched = [n for n in self._factories
+                       if n == p or fnmatch.fnmatchcase(n, p)]
+            if not matched: raise KeyError(p)
+            selected.update(matched)
+        return [n for n in self._factories if n in selected]
+    #end def
+
+    def get(self, name):
+        if self._building: self._building[-1].add(name)
+        p = self._parts.get(name)
+        if p is None:
+            self._building.append(set())
+            try: p = self._factories[name](name)
+            finally: self._requested[name] = self._building.pop()
+            self._parts[name] = p
+        return p
+    #end def
+
+    def requested(self, name):
+        '''Names of the parts the factory requested from the registry when it was last run'''
+        return self._requested.get(name, set())
+
+    def build(self, patterns=None):
+        '''Generates the parts selected by the patterns, building them as needed'''
+        for name in self.names(patterns):
+            yield self.get(name)
+
+    def forget(self, name=None):
+        '''Drops the cached part (or all of them), so it is rebuilt on next request'''
+        if name is None: self._parts.clear()
+        else: self._parts.pop(name, None)
+#end class
@@ -0,0 +1,219 @@
+'''
+Sensitivity of the mass and cost of the parts to the constants of the
+materials and to the densities and costs of individual volumes.
+
+At the default size the mass and cost of a part are linear in these
+parameters, so the whole catalog is compiled once into two matrices
+(parts x parameters) and any number of parameter samples is evaluated
+by a matrix product, without rebuilding the parts.
+'''
+import sys
+
+import numpy as np
+
+
+class linear_catalog(object):
+    '''
+    Mass and cost of the parts at the default size as linear functions
+    of the relative values (factors) of the parameters:
+
+        mass = mass_coeffs.dot(mass_factors) + mass_offset
+        cost = cost_coeffs.dot(cost_factors) + cost_offset
+
+    Mass parameters are densities, cost parameters are costs per volume;
+    the factors are 1 at the nominal values. A material is a single parameter
+    wherever it is used; the density and cost of a volume without a material
+    are its own parameters if per_volume is set and constants otherwise.
+    '''
+    def __init__(self, parts, per_volume=True):
+        self.parts       = list(parts)
+        self.names       = [p.name for p in self.parts]
+        self.mass_params = []
+        self.cost_params = []
+        mass_index  = {}
+        cost_index  = {}
+        mass_coeffs = []
+        cost_coeffs = []
+        mass_offset = []
+        cost_offset = []
+        def add(row, index, params, key, name, nominal, coeff):
+            if not coeff or not nominal: return
+            j = index.get(key)
+            if j is None:
+                j = index[key] = len(params)
+                params.append((name, nominal))
+            row[j] = row.get(j, 0.0)+coeff*nominal
+        #end def
+        for p in self.parts:
+            t = p.compile()
+            u = t.unit
+            paths = []
+            for i, v in enumerate(t.volumes):
+                paths.append(v.name if t.parent[i] < 0 else paths[t.parent[i]]+'/'+v.name)
+            m_row, c_row = {}, {}
+            m_const = p._add_mass
+            c_const = p._add_cost+p._res_cost
+            for i, v in enumerate(t.volumes):
+                V = u['V'][i]
+                mat = v._mat
+                if mat is not None:
+                    name = mat.name or '%s/%s:material' % (p.name, paths[i])
+                    add(m_row, mass_index, self.mass_params, mat, name+'.density', mat.density, V)
+                    add(c_row, cost_index, self.cost_params, mat, name+'.cost', mat.cost, V)
+                elif per_volume:
+                    name = '%s/%s' % (p.name, paths[i])
+                    add(m_row, mass_index, self.mass_params, v, name+'.D', v.d, V)
+                    add(c_row, cost_index, self.cost_params, v, name+'.C', v._cost, V)
+                else:
+                    m_const += V*v.d
+                    c_const += V*v._cost
+                s = v._surface
+                if s is None: continue
+                name = s.m.name or '%s/%s:surface' % (p.name, paths[i])
+                add(m_row, mass_index, self.mass_params, s.m, name+'.density',
+                    s.m.density, u['S'][i]*s.h)
+                add(c_row, cost_index, self.cost_params, s.m, name+'.cost',
+                    s.m.cost, u['S'][i]*s.h/s.unit_h)
+            mass_coeffs.append(m_row)
+            cost_coeffs.append(c_row)
+            mass_offset.append(m_const)
+            cost_offset.append(c_const)
+        self.mass_coeffs = self._matrix(mass_coeffs, len(self.mass_params))
+        self.cost_coeffs = self._matrix(cost_coeffs, len(self.cost_params))
+        self.mass_offset = np.array(mass_offset)
+        self.cost_offset = np.array(cost_offset)
+    #end def
+
+    @staticmethod
+    def _matrix(rows, n):
+        A = np.zeros((len(rows), n))
+        for i, row in enumerate(rows):
+            for j, x in row.items(): A[i,j] = x
+        return A
+    #end def
+
+    def evaluate(self, mass_factors, cost_factors):
+        '''
+        Mass and cost of all parts for the factors of shape (parameters, samples);
+        returns two arrays of shape (parts, samples).
+        '''
+        return (self.mass_coeffs.dot(mass_factors)+self.mass_offset[:,None],
+                self.cost_coeffs.dot(cost_factors)+self.cost_offset[:,None])
+    #end def
+
+    def nominal(self):
+        return (self.mass_coeffs.sum(axis=1)+self.mass_offset,
+                self.cost_coeffs.sum(axis=1)+self.cost_offset)
+    #end def
+
+    def elasticities(self):
+        '''
+        Relative change of the mass and cost of each part per relative change
+        of each parameter: arrays of shape (parts, parameters).
+        '''
+        mass, cost = self.nominal()
+        return (self.mass_coeffs/np.where(mass, mass, 1)[:,None],
+                self.cost_coeffs/np.where(cost, cost, 1)[:,None])
+    #end def
+
+    def one_at_a_time(self, delta=0.01):
+        '''Elasticities by perturbing each parameter by delta in turn, all in one pass'''
+        mass, cost = self.nominal()
+        m, _ = self.evaluate(1+delta*np.identity(len(self.mass_params)),
+                             np.ones((len(self.cost_params), 1)))
+        _, c = self.evaluate(np.ones((len(self.mass_params), 1)),
+                             1+delta*np.identity(len(self.cost_params)))
+        return ((m-mass[:,None])/np.where(mass, mass, 1)[:,None]/delta,
+                (c-cost[:,None])/np.where(cost, cost, 1)[:,None]/delta)
+    #end def
+
+    def sample(self, n, sigma=0.1, seed=None, chunk=10000):
+        '''
+        Evaluates the catalog for n samples of all the parameters drawn
+        independently from the log-normal distribution with the median
+        at the nominal value and the standard deviation of the logarithm sigma.
+        Returns (mass, cost) arrays of shape (parts, n).
+        '''
+        rng  = np.random.RandomState(seed)
+        mass = np.empty((len(self.parts), n))
+        cost = np.empty((len(self.parts), n))
+        for start in range(0, n, chunk):
+            k = min(chunk, n-start)
+            mf = np.exp(sigma*rng.standard_normal((len(self.mass_params), k)))
+            cf = np.exp(sigma*rng.standard_normal((len(self.cost_params), k)))
+            mass[:,start:start+k], cost[:,start:start+k] = self.evaluate(mf, cf)
+        return mass, cost
+    #end def
+#end class
+
+
+def _top(elasticities, params, top):
+    order = np.argsort(-abs(elasticities))[:top]
+    return ', '.join('%s %.3f' % (params[j][0], elasticities[j])
+                     for j in order if elasticities[j])
+#end def
+
+
+def report_lines(model, samples=None, elasticities=None, top=5):
+    '''Per-part statistics of the samples and the largest elasticities'''
+    nominal = model.nominal()
+    if elasticities is None: elasticities = model.elasticities()
+    for i, name in enumerate(model.names):
+        yield '//=== %s ===' % name
+        for k, (title, unit, params) in enumerate((('mass', 't', model.mass_params),
+                                                   ('cost', 'Cr', model.cost_params))):
+            line = '%s = %.6f %s' % (title, nominal[k][i], unit)
+            if samples is not None:
+                x = samples[k][i]
+                mean, std = x.mean(), x.std()
+                lo, hi = np.percentile(x, [5, 95])
+                line += ('; mean %.6f, std %.6f (%.2f%%), 90%%: [%.6f, %.6f]' %
+                         (mean, std, 100*std/mean if mean else 0, lo, hi))
+            yield line
+            yield '   elasticities: %s' % _top(elasticities[k][i], params, top)
+    #parameters that matter the most across the catalog
+    for k, (title, params) in enumerate((('mass', model.mass_params),
+                                         ('cost', model.cost_params))):
+        yield '//=== Catalog %s ===' % title
+        yield '   mean elasticities: %s' % _top(abs(elasticities[k]).mean(axis=0), params, top)
+#end def
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    from catalog import parts
+    from base_classes import write_lines
+    parser = argparse.ArgumentParser(description='Sensitivity of the mass and cost of the parts '
+                                     'to the materials and the densities and costs of volumes')
+    parser.add_argument('-p', '--part', action='append', metavar='NAME',
+                        help='analyse only the parts matching NAME (glob); may be repeated')
+    parser.add_argument('-n', '--samples', type=int, default=10000,
+                        help='number of Monte Carlo samples; 0 for elasticities only '
+                        '(default: %(default)s)')
+    parser.add_argument('--sigma', type=float, default=0.1,
+                        help='standard deviation of the logarithm of the parameters '
+                        '(default: %(default)s)')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--materials-only', action='store_true',
+                        help='vary only the materials; densities and costs of the volumes '
+                        'without a material are kept')
+    parser.add_argument('--oat', metavar='DELTA', type=float,
+                        help='compute elasticities by changing one parameter at a time by DELTA '
+                        'instead of analytically')
+    parser.add_argument('--top', type=int, default=5,
+                        help='number of elasticities to show per part (default: %(default)s)')
+    args = parser.parse_args()
+    try: names = parts.names(args.part)
+    except KeyError as e: parser.error('no part matches %s' % e)
+    start = time.time()
+    model = linear_catalog(parts.build(names), not args.materials_only)
+    compiled = time.time()
+    samples = model.sample(args.samples, args.sigma, args.seed) if args.samples > 0 else None
+    sampled = time.time()
+    el = model.one_at_a_time(args.oat) if args.oat else model.elasticities()
+    write_lines(report_lines(model, samples, el, args.top))
+    sys.stderr.write('%d parts, %d mass and %d cost parameters; '
+                     'compiled in %.3fs, %d samples in %.3fs\n' %
+                     (len(model.parts), len(model.mass_params), len(model.cost_params),
+                      compiled-start, args.samples, sampled-compiled))
@@ -0,0 +1,234 @@
+'''
+Local HTTP/JSON service answering mass and cost queries about the parts
+from the catalog kept in memory.
+
+    GET  /parts                            names of the parts
+    GET  /query?part=NAME&scale=2.5&length=1.3[&grid=1][&breakdown=1]
+    POST /query   {"part": NAME, "scale": ..., "length": ..., "grid": ..., "breakdown": ...}
+    POST /batch   [QUERY, ...]
+    POST /reload  reload the changed sources now
+
+scale and length are numbers or lists. Lists are paired element-wise
+(with broadcasting), or form a len(scale) x len(length) table if grid is set.
+The results have the same shape. breakdown adds the mass and cost of every node.
+The sources are checked for changes at most once per the poll interval,
+before answering a request. Connections are kept alive and served by their
+own threads, while the queries themselves are answered one at a time.
+'''
+import sys
+import json
+import time
+import threading
+try: from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError: from http.server import BaseHTTPRequestHandler, HTTPServer
+try: from SocketServer import ThreadingMixIn
+except ImportError: from socketserver import ThreadingMixIn
+try: from urlparse import urlparse, parse_qs
+except ImportError: from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from live_catalog import live_catalog
+
+
+class QueryError(Exception):
+    def __init__(self, message, status=400):
+        Exception.__init__(self, message)
+        self.status = status
+#end class
+
+
+def _array(x, what):
+    try: a = np.asarray(x, dtype=float)
+    except (TypeError, ValueError): raise QueryError('%s should be a number or a list' % what)
+    if not np.all(np.isfinite(a)): raise QueryError('%s should be finite' % what)
+    if not np.all(a > 0): raise QueryError('%s should be positive' % what)
+    return a
+#end def
+
+
+def _list(a, what):
+    if not np.all(np.isfinite(a)): raise QueryError('the %s is not finite; the size is too large' % what)
+    return a.tolist()
+#end def
+
+
+class query_engine(object):
+    '''Answers the queries from a live_catalog'''
+    def __init__(self, catalog, poll=1.0):
+        self.catalog = catalog
+        self.poll    = poll
+        self.checked = time.time()
+        self.lock    = threading.Lock()
+    #end def
+
+    def refresh(self, force=False):
+        '''Reloads the changed sources if the poll interval has passed'''
+        now = time.time()
+        if not force and now-self.checked < self.poll: return [], []
+        self.checked = now
+        changed, removed, _ = self.catalog.update()
+        if changed or removed:
+            sys.stderr.write('reloaded: %s; removed: %s\n' %
+                             (', '.join(changed) or '-', ', '.join(removed) or '-'))
+        if self.catalog.error: sys.stderr.write('reload failed: %s\n' % self.catalog.error)
+        return changed, removed
+    #end def
+
+    def warm(self):
+        '''Builds and compiles all the parts'''
+        for name in self.catalog: self.catalog.tree(name)
+    #end def
+
+    def query(self, q):
+        #too large sizes overflow to inf, which _list reports as an error
+        with np.errstate(over='ignore', invalid='ignore'): return self._query(q)
+
+    def _query(self, q):
+        if not isinstance(q, dict): raise QueryError('a query should be an object')
+        name = q.get('part')
+        if not isinstance(name, (str, type(u''))): raise QueryError('part should be a name')
+        if name not in self.catalog: raise QueryError('no part %s' % name, 404)
+        p = self.catalog.get(name)
+        scale  = _array(q.get('scale', p._size), 'scale')
+        length = _array(q.get('length', 1), 'length')
+        if q.get('grid'):
+            scale, length = np.meshgrid(scale, length, indexing='ij')
+        else:
+            try: scale, length = np.broadcast_arrays(scale, length)
+            except ValueError: raise QueryError('scale and length cannot be paired')
+        cost = p.cost(scale, length)
+        res = {'part':      name,
+               'scale':     scale.tolist(),
+               'length':    length.tolist(),
+               'mass':      _list(p.mass(scale, length), 'mass'),
+               'cost':      _list(cost, 'cost'),
+               'entryCost': _list(np.ceil(p.entry_cost(cost-p._res_cost)), 'entryCost')}
+        if q.get('breakdown'):
+            t  = self.catalog.tree(name)
+            ev = t.evaluate(scale/p._size, length)
+            res['nodes'] = [{'name': t.names[i], 'parent': int(t.parent[i]),
+                             'mass': _list(ev.full_mass[...,i], 'mass'),
+                             'cost': _list(ev.full_cost[...,i], 'cost')}
+                            for i in range(len(t))]
+        return res
+    #end def
+
+    def batch(self, queries):
+        '''Answers every query of the list; a failed query gives {"error": ...} in its place'''
+        if not isinstance(queries, list): raise QueryError('a batch should be a list of queries')
+        results = []
+        for q in queries:
+            try: results.append(self.query(q))
+            except QueryError as e: results.append({'error': str(e)})
+            except (TypeError, ValueError, ArithmeticError) as e:
+                results.append({'error': '%s: %s' % (e.__class__.__name__, e)})
+        return results
+    #end def
+#end class
+
+
+class query_handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    #the response is written at once, without waiting for the ACK of the headers
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    engine  = None
+    verbose = False
+
+    def log_message(self, *args):
+        if self.verbose: BaseHTTPRequestHandler.log_message(self, *args)
+
+    def send(self, status, data):
+        try: body = json.dumps(data, allow_nan=False).encode('utf8')
+        except ValueError:
+            status, body = 500, json.dumps({'error': 'the result is not finite'}).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    #end def
+
+    def body(self):
+        n = int(self.headers.get('Content-Length', 0))
+        if not n: return None
+        try: return json.loads(self.rfile.read(n).decode('utf8'))
+        except ValueError: raise QueryError('the body is not valid JSON')
+    #end def
+
+    def handle_query(self, method, body=None):
+        url = urlparse(self.path)
+        self.engine.refresh(url.path == '/reload')
+        if url.path == '/parts' and method == 'GET':
+            return list(self.engine.catalog)
+        if url.path == '/query' and method == 'GET':
+            q = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+            for k in ('scale', 'length'):
+                if k in q: q[k] = [float(x) for x in q[k].split(',')] if ',' in q[k] else q[k]
+            for k in ('grid', 'breakdown'):
+                if k in q: q[k] = q[k] not in ('0', 'false', '')
+            return self.engine.query(q)
+        if url.path == '/query' and method == 'POST':
+            return self.engine.query(body)
+        if url.path == '/batch' and method == 'POST':
+            return self.engine.batch(body)
+        if url.path == '/reload' and method == 'POST':
+            return {'error': self.engine.catalog.error}
+        raise QueryError('no %s %s' % (method, url.path), 404)
+    #end def
+
+    def handle_method(self, method):
+        try:
+            body = self.body() if method == 'POST' else None
+            with self.engine.lock: data = self.handle_query(method, body)
+        except QueryError as e: return self.send(e.status, {'error': str(e)})
+        except (TypeError, ValueError, ArithmeticError) as e:
+            return self.send(400, {'error': '%s: %s' % (e.__class__.__name__, e)})
+        except Exception as e:
+            return self.send(500, {'error': '%s: %s' % (e.__class__.__name__, e)})
+        self.send(200, data)
+    #end def
+
+    def do_GET(self): self.handle_method('GET')
+
+    def do_POST(self): self.handle_method('POST')
+#end class
+
+
+class query_server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+if __name__ == '__main__':
+    import argparse
+    import part_files
+    parser = argparse.ArgumentParser(description='Serve mass and cost queries '
+                                     'about the parts over HTTP')
+    parser.add_argument('-b', '--bind', default='127.0.0.1',
+                        help='address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8642,
+                        help='port to listen on (default: %(default)s)')
+    parser.add_argument('-f', '--part-files', action='append', default=[], metavar='PATH',
+                        help='serve also the parts described in the JSON file '
+                        '(or in the *.json files of the directory); may be given several times')
+    parser.add_argument('--part-files-cache', metavar='DIR', default=part_files.default_cache,
+                        help='directory of the compiled cache of the part files '
+                        '(default: %(default)s)')
+    parser.add_argument('--poll', type=float, default=1.0,
+                        help='seconds between the checks of the sources for changes '
+                        '(default: %(default)s)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log the requests')
+    args = parser.parse_args()
+    start = time.time()
+    try: catalog = live_catalog(args.part_files, args.part_files_cache)
+    except (part_files.PartFileError, IOError, ValueError) as e: parser.error(str(e))
+    query_handler.engine  = query_engine(catalog, args.poll)
+    query_handler.engine.warm()
+    query_handler.verbose = args.verbose
+    server = query_server((args.bind, args.port), query_handler)
+    sys.stderr.write('%d parts loaded in %.3fs; listening on http://%s:%d\n' %
+                     (len(catalog.parts), time.time()-start, args.bind, args.port))
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    server.server_close()
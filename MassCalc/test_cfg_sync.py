@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+'''
+Tests of the write-back of the computed values into the part configs,
+made on a temporary copy of a shipped config.
+
+    python -m unittest test_cfg_sync
+'''
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from cfg_sync import write_cfg, same_values
+from confignode import config_index, default_gamedata
+from catalog import parts
+
+shipped = os.path.join(default_gamedata, 'Hangar', 'Parts', 'InlineHangar.cfg')
+
+#values of the shipped config replaced by stale ones; the comments stay
+stale = ((r'^(\s*entryCost = )\S+', r'\g<1>1'),
+         (r'^(\s*cost = )\S+', r'\g<1>1'),
+         (r'^(\s*mass = )\S+', r'\g<1>1.0'),
+         (r'^(\s*specificMass = )[^/\n]+?( //)', r'\g<1>1.0, 1.0, 0.0, 0.0\2'),
+         (r'^(\s*specificCost = )[^/\n]+?( //)', r'\g<1>1.0, 1.0, 0.0, 0.0\2'))
+
+
+def _read(filename):
+    with open(filename, 'rb') as f: return f.read()
+
+
+def _value(line):
+    return line.partition(b'=')[2].partition(b'//')[0].strip().decode('utf8')
+
+
+class write_cfg_test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp, 'Parts'))
+        self.cfg = os.path.join(self.tmp, 'Parts', 'InlineHangar.cfg')
+        self.shipped = _read(shipped)
+        text = self.shipped.decode('utf8')
+        for pattern, repl in stale:
+            text, n = re.subn(pattern, repl, text, flags=re.M)
+            self.assertEqual(n, 1, pattern)
+        self.stale = text.encode('utf8')
+        with open(self.cfg, 'wb') as f: f.write(self.stale)
+        self.part = parts.get('InlineHangar')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self):
+        return write_cfg([self.part], config_index(self.tmp))
+
+    def test_only_values_change(self):
+        changed = self.write()
+        self.assertEqual(list(changed), [self.cfg])
+        edits = changed[self.cfg]
+        self.assertEqual(sorted(e.key for e in edits),
+                         ['cost', 'entryCost', 'mass', 'specificCost', 'specificMass'])
+        old = self.stale.splitlines(True)
+        new = _read(self.cfg).splitlines(True)
+        ref = self.shipped.splitlines(True)
+        self.assertEqual(len(old), len(new))
+        differ = set(i for i, (a, b) in enumerate(zip(old, new)) if a != b)
+        self.assertEqual(differ, set(e.line for e in edits))
+        for i in differ:
+            #the key with its indentation and the comment after the value are kept
+            self.assertEqual(old[i].split(b'=')[0], new[i].split(b'=')[0])
+            self.assertEqual(old[i].partition(b'//')[1:], new[i].partition(b'//')[1:])
+            #the shipped values are the computed ones
+            self.assertTrue(same_values(_value(new[i]), _value(ref[i]), 1e-6), new[i])
+        self.assertEqual(os.listdir(os.path.dirname(self.cfg)), ['InlineHangar.cfg'])
+
+    def test_second_run_makes_no_edits(self):
+        self.write()
+        written = _read(self.cfg)
+        self.assertEqual(self.write(), {})
+        self.assertEqual(_read(self.cfg), written)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+'''
+What-if analysis of material substitution: the mass and cost of a part
+for every combination of candidate materials of its surfaces and volumes,
+reduced to the Pareto front of mass versus cost.
+
+The mass and cost of a part are sums of independent contributions
+of its nodes, so combinations are built one choice at a time and every
+partial combination dominated by another one is dropped right away:
+adding the same remaining choices to both cannot make it better.
+'''
+import fnmatch
+
+import numpy as np
+
+from base_classes import material, format_data
+from components import named_materials
+
+
+def pareto_mask(mass, cost):
+    '''Mask of the points not dominated by any other point (the first of equal ones is kept)'''
+    order = np.lexsort((cost, mass))
+    c = cost[order]
+    best = np.minimum.accumulate(c)
+    keep = np.ones(len(c), dtype=bool)
+    keep[1:] = c[1:] < best[:-1]
+    mask = np.zeros(len(c), dtype=bool)
+    mask[order[keep]] = True
+    return mask
+#end def
+
+
+class choice(object):
+    '''
+    A decision of the what-if analysis: the material of the surfaces (kind='surface')
+    or of the content (kind='volume') of all the nodes matching the pattern.
+    mass and cost are the contributions of the nodes for each candidate material.
+    '''
+    def __init__(self, pattern, kind, candidates, nodes, mass, cost, current,
+                 base_mass, base_cost):
+        self.pattern    = pattern
+        self.kind       = kind
+        self.candidates = candidates
+        self.nodes      = nodes
+        self.mass       = mass
+        self.cost       = cost
+        self.current    = current
+        #contributions of the nodes with their current materials
+        self.base_mass  = base_mass
+        self.base_cost  = base_cost
+#end class
+
+
+class what_if(object):
+    def __init__(self, p, materials=None):
+        self.part      = p
+        self.materials = named_materials() if materials is None else materials
+        self.choices   = []
+        t = self.tree  = p.compile()
+        self.paths = []
+        for i, v in enumerate(t.volumes):
+            self.paths.append(v.name if t.parent[i] < 0 else self.paths[t.parent[i]]+'/'+v.name)
+        self._taken = set()
+    #end def
+
+    def _match(self, pattern):
+        return [i for i, path in enumerate(self.paths)
+                if fnmatch.fnmatchcase(path, pattern) or
+                fnmatch.fnmatchcase(self.tree.names[i], pattern)]
+    #end def
+
+    def add(self, pattern, candidates, kind='surface'):
+        '''
+        Adds a choice of the material among the candidates (names or materials)
+        for the surfaces or the content of the nodes matching the pattern (glob
+        of the node path or name). A node may take part in only one choice per kind.
+        '''
+        if kind not in ('surface', 'volume'): raise ValueError('unknown kind: %s' % kind)
+        mats = []
+        for c in candidates:
+            if isinstance(c, material): mats.append(c)
+            elif c in self.materials: mats.append(self.materials[c])
+            else: raise ValueError('unknown material: %s' % c)
+        t, u = self.tree, self.tree.unit
+        nodes = [i for i in self._match(pattern) if (kind, i) not in self._taken and
+                 (kind == 'volume' or t.volumes[i]._surface is not None)]
+        if not nodes: raise ValueError('no %s matches %s' % (kind, pattern))
+        self._taken.update((kind, i) for i in nodes)
+        nodes = np.array(nodes)
+        if kind == 'surface':
+            geom_m = (u['S'][nodes]*t.h[nodes]).sum()
+            geom_c = (u['S'][nodes]*t.h[nodes]/t.unit_h).sum()
+            base_m = u['S_mass'][nodes].sum()
+            base_c = u['S_cost'][nodes].sum()
+            current = [t.volumes[i]._surface.m for i in nodes]
+        else:
+            geom_m = geom_c = u['V'][nodes].sum()
+            base_m = u['V_mass'][nodes].sum()
+            base_c = u['V_cost'][nodes].sum()
+            current = [t.volumes[i]._mat for i in nodes]
+        mass = geom_m*np.array([m.density for m in mats])
+        cost = geom_c*np.array([m.cost for m in mats])
+        #the current material is a candidate only if all the nodes share it
+        current = mats.index(current[0]) if current[0] in mats and \
+            all(m is current[0] for m in current) else None
+        ch = choice(pattern, kind, [m.name for m in mats], [self.paths[i] for i in nodes],
+                    mass, cost, current, base_m, base_c)
+        self.choices.append(ch)
+        return ch
+    #end def
+
+    @property
+    def base(self):
+        '''Mass and cost of the part without the contributions of the chosen nodes'''
+        p = self.part
+        return (p._init_mass - sum(ch.base_mass for ch in self.choices),
+                p._cost - sum(ch.base_cost for ch in self.choices))
+    #end def
+
+    def evaluate(self, combinations):
+        '''
+        Mass and cost of the part for the combinations: an integer array
+        (..., choices) of the indices of the candidates of each choice.
+        '''
+        combinations = np.asarray(combinations)
+        mass, cost = self.base
+        for k, ch in enumerate(self.choices):
+            mass = mass + ch.mass[combinations[...,k]]
+            cost = cost + ch.cost[combinations[...,k]]
+        return mass, cost
+    #end def
+
+    def combinations(self):
+        return int(np.prod([len(ch.candidates) for ch in self.choices]))
+    #end def
+
+    def front(self, max_mass=None, max_cost=None):
+        '''
+        Returns (mass, cost, combinations) of the Pareto front ordered by mass.
+        Partial combinations that are dominated, or that cannot stay within
+        max_mass and max_cost whatever the remaining choices, are pruned.
+        '''
+        mass, cost = self.base
+        mass = np.array([mass])
+        cost = np.array([cost])
+        combs = np.zeros((1, 0), dtype=int)
+        #the least mass and cost the remaining choices can add
+        rest_m = np.cumsum([ch.mass.min() for ch in self.choices][::-1])[::-1]
+        rest_c = np.cumsum([ch.cost.min() for ch in self.choices][::-1])[::-1]
+        rest_m = np.append(rest_m, 0)[1:]
+        rest_c = np.append(rest_c, 0)[1:]
+        for k, ch in enumerate(self.choices):
+            n = len(ch.candidates)
+            mass  = (mass[:,None]+ch.mass[None,:]).ravel()
+            cost  = (cost[:,None]+ch.cost[None,:]).ravel()
+            combs = np.concatenate([np.repeat(combs, n, axis=0),
+                                    np.tile(np.arange(n), len(combs))[:,None]], axis=1)
+            keep = pareto_mask(mass, cost)
+            if max_mass is not None: keep &= mass+rest_m[k] <= max_mass
+            if max_cost is not None: keep &= cost+rest_c[k] <= max_cost
+            mass, cost, combs = mass[keep], cost[keep], combs[keep]
+        order = np.argsort(mass, kind='mergesort')
+        return mass[order], cost[order], combs[order]
+    #end def
+
+    def lines(self, max_mass=None, max_cost=None):
+        '''Report of the Pareto front; the current combination, if on the front, is marked'''
+        mass, cost, combs = self.front(max_mass, max_cost)
+        current = [ch.current for ch in self.choices]
+        yield '//=== %s: %d choices, %d combinations, %d on the Pareto front ===' % \
+            (self.part.name, len(self.choices), self.combinations(), len(mass))
+        for ch in self.choices:
+            yield '//%s %s: %s' % (ch.kind, ch.pattern, ', '.join(ch.nodes))
+        if None not in current:
+            m, c = self.evaluate(current)
+            yield '//current: mass %.6f t, cost %.3f Cr' % (m, c)
+        if not len(mass): return
+        entry = np.ceil(self.part.entry_cost(cost-self.part._res_cost))
+        columns = [['%.3f' % c for c in cost], ['%d' % e for e in entry]]
+        for k, ch in enumerate(self.choices):
+            columns.append([ch.candidates[i] for i in combs[:,k]])
+        yield '//mass : cost : entryCost : '+' : '.join(ch.pattern for ch in self.choices)
+        table = format_data(['%.6f' % m for m in mass], columns).splitlines()
+        for comb, line in zip(combs, table):
+            yield '//'+line+('<- current' if list(comb) == current else '')
+    #end def
+#end class
+
+
+def parse_choice(text):
+    '''PATTERN=MATERIAL,MATERIAL,...'''
+    pattern, sep, mats = text.partition('=')
+    if not sep or not pattern or not mats:
+        raise ValueError('expected PATTERN=MATERIAL,MATERIAL,...: %s' % text)
+    return pattern, [m.strip() for m in mats.split(',') if m.strip()]
+#end def
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+    from catalog import parts
+    from base_classes import write_lines
+    parser = argparse.ArgumentParser(description='Pareto front of mass and cost of a part '
+                                     'over the combinations of candidate materials')
+    parser.add_argument('part', nargs='?')
+    parser.add_argument('-s', '--surface', action='append', default=[], metavar='PATTERN=MATS',
+                        help='candidate materials of the surfaces of the nodes matching '
+                        'PATTERN (glob of the node path or name); may be repeated')
+    parser.add_argument('-v', '--volume', action='append', default=[], metavar='PATTERN=MATS',
+                        help='candidate materials of the content of the matching nodes')
+    parser.add_argument('--max-mass', type=float)
+    parser.add_argument('--max-cost', type=float)
+    parser.add_argument('-m', '--materials', action='store_true',
+                        help='list the available materials and exit')
+    args = parser.parse_args()
+    mats = named_materials()
+    if args.materials:
+        for name in sorted(mats):
+            print('%s: %st/m^3, %sCr' % (name, mats[name].density, mats[name].cost))
+        sys.exit()
+    if args.part is None: parser.error('a part is required')
+    try: p = parts.get(args.part)
+    except KeyError: parser.error('no part %s' % args.part)
+    w = what_if(p, mats)
+    try:
+        for kind, specs in (('surface', args.surface), ('volume', args.volume)):
+            for spec in specs:
+                pattern, candidates = parse_choice(spec)
+                w.add(pattern, candidates, kind)
+    except ValueError as e: parser.error(str(e))
+    if not w.choices: parser.error('nothing to choose; use --surface or --volume')
+    write_lines(w.lines(args.max_mass, args.max_cost))
@@ -1,22 +1,33 @@
 #!/usr/bin/env python
- 
+
 import sys
- 
-if (len(sys.argv) < 2):
-    print("Usage: " + sys.argv[0] + " github-user [github-project]")
-    exit(1)
- 
+import argparse
+
 try:
   import requests
+  from requests.adapters import HTTPAdapter
 except ImportError:
     print("Error: requests is not installed")
     print("Installing Requests is simple with pip:\n  pip install requests")
     print("More info: http://docs.python-requests.org/en/latest/")
     exit(1)
-import io
+import os
 import json
- 
- 
+import time
+import random
+import hashlib
+import sqlite3
+import datetime
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+api_url = 'https://api.github.com'
+per_page = 100
+default_cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'hangar-stats')
+default_history = os.path.join(default_cache_dir, 'history.sqlite')
+
+
 def dict_to_object(d):
     if '__class__' in d:
         class_name = d.pop('__class__')
@@ -28,43 +39,521 @@ def dict_to_object(d):
     else:
         inst = d
     return inst
- 
- 
+
+
 def ensure_str(s):
     if isinstance(s, unicode):
         s = s.encode('utf-8')
     return s
- 
-full_names = []
- 
-if len(sys.argv) == 3:
-    full_names.append(sys.argv[1] + "/" + sys.argv[2])
-else:
-    buf = io.StringIO()
-    r = requests.get('https://api.github.com/users/' + sys.argv[1] + '/repos')
-    myobj = r.json()
- 
-    for rep in myobj:
-        full_names.insert(0, ensure_str(rep['full_name']))
- 
- 
-for full_name in full_names:
-    buf = io.StringIO()
+
+
+def make_session(jobs):
+    """A session with a keep-alive connection pool large enough for all the jobs"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept'] = 'application/vnd.github.v3+json'
+    return session
+
+
+class response_cache(object):
+    """
+    On-disk cache of JSON responses keyed by URL, with their ETag and Last-Modified
+    headers and the time they were last confirmed by the server.
+    """
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path): os.makedirs(path)
+
+    def _filename(self, url):
+        return os.path.join(self.path, hashlib.sha1(url.encode('utf-8')).hexdigest()+'.json')
+
+    def get(self, url):
+        try:
+            with open(self._filename(url)) as f: entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def put(self, url, data, etag=None, last_modified=None, checked=None, next_url=None):
+        entry = {'url': url, 'data': data, 'etag': etag, 'last_modified': last_modified,
+                 'next': next_url, 'checked': time.time() if checked is None else checked}
+        filename = self._filename(url)
+        tmp = '%s.%d.%d.tmp' % (filename, os.getpid(), threading.current_thread().ident)
+        with open(tmp, 'w') as f: json.dump(entry, f)
+        os.rename(tmp, filename)
+        return entry
+
+
+class offline_miss(Exception): pass
+
+
+class api_error(requests.HTTPError):
+    """An error response of the API with the message from its JSON body"""
+    def __init__(self, response):
+        try: message = response.json().get('message')
+        except (ValueError, AttributeError): message = None
+        requests.HTTPError.__init__(self, '%d %s: %s' % (response.status_code,
+                                                         message or response.reason,
+                                                         response.url), response=response)
+        self.status = response.status_code
+
+
+class rate_limited(requests.RequestException): pass
+
+
+class rate_limiter(object):
+    """
+    Keeps track of the request budget reported by the X-RateLimit-* headers.
+    When the budget is exhausted requests wait for the reset; when it runs low
+    (below low_water of the limit) they are spaced evenly over the rest of the window.
+    Requests in flight are counted against the budget, so concurrent threads
+    do not overshoot it.
+    """
+    def __init__(self, low_water=0.1, max_wait=900):
+        self.lock      = threading.Lock()
+        self.low_water = low_water
+        self.max_wait  = max_wait
+        self.limit     = None
+        self.remaining = None
+        self.reset     = 0
+        self.next_slot = 0
+        self.blocked   = 0
+
+    def reserve(self):
+        """Takes a request from the budget; returns how long to wait before making it"""
+        with self.lock:
+            now   = time.time()
+            start = max(now, self.next_slot, self.blocked)
+            if self.remaining is not None and self.reset > now:
+                if self.remaining <= 0:
+                    start = max(start, self.reset)
+                elif self.limit and self.remaining < self.limit*self.low_water:
+                    self.next_slot = start + (self.reset-now)/float(self.remaining)
+                self.remaining -= 1
+            return start-now
+
+    def update(self, headers):
+        try:
+            limit     = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset     = float(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            if reset == self.reset and self.remaining is not None:
+                #responses may come out of order
+                remaining = min(remaining, self.remaining)
+            self.limit, self.remaining, self.reset = limit, remaining, reset
+
+    def block(self, seconds):
+        """Holds all requests back for the given time (Retry-After)"""
+        with self.lock:
+            self.blocked = max(self.blocked, time.time()+seconds)
+
+
+class github_client(object):
+    """
+    Makes GET requests to the API through the cache: fresh entries (younger than ttl seconds)
+    are served locally, stale ones are revalidated with a conditional request.
+    In the offline mode only the cache is used.
+    Requests go through the rate limiter; rate limited responses, server errors
+    and connection failures are retried up to retries times with exponential backoff.
+    """
+    def __init__(self, session, cache=None, ttl=0, offline=False, timeout=30,
+                 limiter=None, retries=5, backoff=1.0):
+        self.session = session
+        self.cache   = cache
+        self.ttl     = ttl
+        self.offline = offline
+        self.timeout = timeout
+        self.limiter = limiter or rate_limiter()
+        self.retries = retries
+        self.backoff = backoff
+
+    def _backoff(self, attempt):
+        return self.backoff * 2**attempt * random.uniform(0.5, 1)
+
+    def _retry_delay(self, r, attempt):
+        """Seconds to wait before retrying the request, or None if it should not be retried"""
+        if attempt >= self.retries: return None
+        if r.status_code in (403, 429):
+            retry_after = r.headers.get('Retry-After')
+            if retry_after is not None:
+                try: delay = float(retry_after)
+                except ValueError: delay = self._backoff(attempt)
+                self.limiter.block(delay)
+                return delay
+            #the limiter already knows when the budget is reset
+            if r.headers.get('X-RateLimit-Remaining') == '0': return 0
+            return None
+        if r.status_code >= 500: return self._backoff(attempt)
+        return None
+
+    def _get(self, url, headers):
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve()
+            if wait > self.limiter.max_wait:
+                raise rate_limited('rate limit is reset in %d s: %s' % (wait, url))
+            if wait > 0: time.sleep(wait)
+            try:
+                r = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries: raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self.limiter.update(r.headers)
+            delay = self._retry_delay(r, attempt)
+            if delay is None or delay > self.limiter.max_wait: return r
+            time.sleep(delay)
+            attempt += 1
+
+    def get_page(self, url):
+        """Returns the JSON of the response and the URL of the next page (or None)"""
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and (self.offline or time.time()-entry['checked'] < self.ttl):
+            return entry['data'], entry.get('next')
+        if self.offline: raise offline_miss('not in cache: %s' % url)
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'): headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+        r = self._get(url, headers)
+        if r.status_code == 304 and entry is not None:
+            self.cache.put(url, entry['data'], entry.get('etag'), entry.get('last_modified'),
+                           next_url=entry.get('next'))
+            return entry['data'], entry.get('next')
+        if r.status_code >= 400: raise api_error(r)
+        data = r.json()
+        next_url = r.links.get('next', {}).get('url')
+        if self.cache:
+            self.cache.put(url, data, r.headers.get('ETag'), r.headers.get('Last-Modified'),
+                           next_url=next_url)
+        return data, next_url
+
+    def get_json(self, url):
+        return self.get_page(url)[0]
+
+    def iter_pages(self, url):
+        """Follows the rel="next" links, yielding the items of every page as it arrives"""
+        while url:
+            data, url = self.get_page(url)
+            if not isinstance(data, list):
+                raise ValueError('unexpected response: %s' % json.dumps(data)[:200])
+            yield data
+
+
+def paged(url):
+    return url + ('&' if '?' in url else '?') + 'per_page=%d' % per_page
+
+
+def user_repos(client, user):
+    """Repository objects of the user in the reverse order of the listing"""
+    repos = []
+    for page in client.iter_pages(paged('%s/users/%s/repos' % (api_url, user))):
+        repos.extend(page)
+    return repos[::-1]
+
+
+def prioritize(repos, downloads=None):
+    """
+    Full names of the repositories, most important first: by the downloads
+    recorded in the history, then by stars and forks; ties keep their order.
+    """
+    downloads = downloads or {}
+    key = lambda rep: (-downloads.get(ensure_str(rep['full_name']), 0),
+                       -rep.get('stargazers_count', 0), -rep.get('forks_count', 0))
+    return [ensure_str(rep['full_name']) for rep in sorted(repos, key=key)]
+
+
+def iter_releases(client, full_name, oldest_first=False):
+    """Releases of the repository, newest first as the API sends them, page by page"""
+    pages = client.iter_pages(paged('%s/repos/%s/releases' % (api_url, full_name)))
+    if oldest_first:
+        releases = [p for page in pages for p in page]
+        return reversed(releases)
+    return (p for page in pages for p in page)
+
+
+def release_lines(full_name, releases, counts=None):
+    """
+    Report lines of the releases; the total is accumulated on the way.
+    If counts is a list, (tag, asset, download count) of every asset is appended to it.
+    """
+    yield "Repository: %s" % full_name
+    total_downloads = 0
+    for p in releases:
+        if "assets" in p:
+            for asset in p['assets']:
+                total_downloads += asset['download_count']
+                if counts is not None:
+                    counts.append((ensure_str(p['tag_name']), ensure_str(asset['name']),
+                                   asset['download_count']))
+                yield ("Tag: %s\nFile: %s\nCreated at: %s" %
+                       (p['tag_name'], asset['name'], asset['created_at']))
+                yield "Downloads: %d" % asset['download_count']
+                yield ""
+        else:
+            yield "No data"
+    yield 'Total downloads: %d' % total_downloads
+
+
+fetch_errors = (requests.RequestException, ValueError, KeyError, offline_miss)
+
+
+def fetch_report(client, full_name, oldest_first=False):
+    """
+    Returns (report lines, asset counts, error) of the repository;
+    lines stop at the error, if any.
+    """
+    lines, counts = [], []
+    try:
+        lines.extend(release_lines(full_name, iter_releases(client, full_name, oldest_first),
+                                   counts))
+        return lines, counts, None
+    except fetch_errors as e:
+        return lines, counts, e
+
+
+class download_history(object):
+    """
+    SQLite store of download counts: every run appends a snapshot of
+    (repo, tag, asset, timestamp, count) rows. Deltas between two moments
+    are computed from the last count of each asset at or before each of them;
+    the assets that did not exist at the start count from zero.
+    """
+    schema = """
+    CREATE TABLE IF NOT EXISTS downloads (
+        repo      TEXT    NOT NULL,
+        tag       TEXT    NOT NULL,
+        asset     TEXT    NOT NULL,
+        timestamp INTEGER NOT NULL,
+        count     INTEGER NOT NULL,
+        PRIMARY KEY (repo, tag, asset, timestamp));
+    CREATE INDEX IF NOT EXISTS downloads_timestamp ON downloads (timestamp);
+    """
+
+    #last count of every asset at or before the moment
+    last_counts = """
+    SELECT d.repo, d.tag, d.asset, d.count FROM downloads d JOIN
+        (SELECT repo, tag, asset, MAX(timestamp) AS timestamp FROM downloads
+         WHERE timestamp <= :{0} AND repo GLOB :repos GROUP BY repo, tag, asset) m
+    ON d.repo = m.repo AND d.tag = m.tag AND d.asset = m.asset AND d.timestamp = m.timestamp
+    """
+
+    groups = {'asset':   ('e.repo, e.tag, e.asset', 'e.repo, e.tag, e.asset'),
+              'release': ('e.repo, e.tag',          'e.repo, e.tag'),
+              'repo':    ('e.repo',                 'e.repo')}
+
+    def __init__(self, path):
+        self.path = path
+        dirname = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(dirname): os.makedirs(dirname)
+        self.db = sqlite3.connect(path)
+        self.db.text_factory = str
+        self.db.executescript(self.schema)
+
+    def close(self): self.db.close()
+
+    def record(self, rows, timestamp=None):
+        """Appends (repo, tag, asset, count) rows as one snapshot in a single transaction"""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?)',
+                                ((repo, tag, asset, timestamp, count)
+                                 for repo, tag, asset, count in rows))
+        return timestamp
+
+    def totals(self, repos='*'):
+        """{repo: downloads} by the last recorded counts"""
+        query = 'SELECT repo, SUM(count) FROM (%s) GROUP BY repo' % self.last_counts.format('t')
+        return dict(self.db.execute(query, {'t': time.time(), 'repos': repos}))
+
+    def span(self, repos='*'):
+        """(first, last) timestamps of the snapshots of the matching repos"""
+        return self.db.execute('SELECT MIN(timestamp), MAX(timestamp) FROM downloads '
+                               'WHERE repo GLOB ?', (repos,)).fetchone()
+
+    def deltas(self, since, until=None, by='release', repos='*', limit=None):
+        """
+        Downloads between since and until (timestamps) grouped by asset, release or repo,
+        largest first. Returns a list of (group columns..., delta) tuples.
+        """
+        first, last = self.span(repos)
+        if first is None: return []
+        since = max(since, first)
+        until = last if until is None else until
+        columns, group = self.groups[by]
+        query = ("SELECT %s, SUM(e.count - COALESCE(s.count, 0)) AS delta "
+                 "FROM (%s) e LEFT JOIN (%s) s "
+                 "ON e.repo = s.repo AND e.tag = s.tag AND e.asset = s.asset "
+                 "GROUP BY %s HAVING delta != 0 ORDER BY delta DESC, %s" %
+                 (columns, self.last_counts.format('until'), self.last_counts.format('since'),
+                  group, group))
+        if limit is not None: query += ' LIMIT %d' % limit
+        return self.db.execute(query, {'since': since, 'until': until,
+                                       'repos': repos}).fetchall()
+
+    def daily(self, since, repos='*'):
+        """
+        Returns [(date, delta)] of the local days from since to the last snapshot.
+        The counts before the first snapshot are unknown, so its day counts from it.
+        """
+        first, last = self.span(repos)
+        if first is None: return []
+        day = datetime.date.fromtimestamp(max(since, first))
+        end = datetime.date.fromtimestamp(last)
+        query = ('SELECT SUM(count) FROM (%s)' % self.last_counts.format('t'))
+        total = lambda t: self.db.execute(query, {'t': t, 'repos': repos}).fetchone()[0] or 0
+        midnight = lambda d: time.mktime(d.timetuple())
+        prev = total(max(midnight(day)-1, first))
+        days = []
+        while day <= end:
+            t = total(midnight(day+datetime.timedelta(days=1))-1)
+            days.append((day, t-prev))
+            prev = t
+            day += datetime.timedelta(days=1)
+        return days
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Print download counts of GitHub releases')
+    parser.add_argument('targets', metavar='USER[/PROJECT]', nargs='+',
+                        help='GitHub users whose repositories are listed, '
+                        'or single repositories as user/project')
+    parser.add_argument('-j', '--jobs', type=int, default=8,
+                        help='maximum number of concurrent requests (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='timeout of a single request in seconds (default: %(default)s)')
+    parser.add_argument('--api-url', default=api_url,
+                        help='GitHub API root (default: %(default)s)')
+    parser.add_argument('--cache-dir', default=default_cache_dir,
+                        help='directory of the response cache (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the response cache')
+    parser.add_argument('--ttl', type=float, default=0,
+                        help='serve cached responses younger than TTL seconds without '
+                        'asking the server; older ones are revalidated (default: %(default)s)')
+    parser.add_argument('--retries', type=int, default=5,
+                        help='retries of a rate limited or failed request (default: %(default)s)')
+    parser.add_argument('--max-wait', type=float, default=900,
+                        help='give up on a request instead of waiting longer than this many '
+                        'seconds for the rate limit reset (default: %(default)s)')
+    parser.add_argument('--offline', action='store_true',
+                        help='answer only from the cache, never contact the server')
+    parser.add_argument('--oldest-first', action='store_true',
+                        help='list the releases from the oldest to the newest; '
+                        'this needs all the pages of a repository before printing it')
+    parser.add_argument('--history', metavar='FILE', default=default_history,
+                        help='SQLite file the download counts of every run are appended to '
+                        '(default: %(default)s)')
+    parser.add_argument('--no-history', action='store_true',
+                        help='do not record the download counts of this run')
+    parser.add_argument('--trend', action='store_true',
+                        help='print the downloads per day and per release over the last '
+                        '--days from the recorded history instead of fetching anything')
+    parser.add_argument('--top', metavar='N', type=int,
+                        help='print the N assets downloaded the most over the last --days '
+                        'from the recorded history instead of fetching anything')
+    parser.add_argument('--days', type=float, default=7,
+                        help='period of --trend and --top in days (default: %(default)s)')
+    return parser.parse_args()
+
+
+def format_time(t):
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(t))
+
+
+def print_trends(history, repos, days, top=None, trend=False):
+    since = time.time()-days*86400
+    first, last = history.span(repos)
+    if first is None:
+        print("No history of %s in %s" % (repos, history.path))
+        return
+    print("History: %s - %s" % (format_time(first), format_time(last)))
+    if trend:
+        print("")
+        print("Downloads per day:")
+        for day, delta in history.daily(since, repos):
+            print("%s  %+d" % (day.isoformat(), delta))
+        print("")
+        print("Downloads per release since %s:" % format_time(max(since, first)))
+        for repo, tag, delta in history.deltas(since, by='release', repos=repos):
+            print("%s %s  %+d" % (repo, tag, delta))
+    if top:
+        print("")
+        print("Top %d assets since %s:" % (top, format_time(max(since, first))))
+        for repo, tag, asset, delta in history.deltas(since, by='asset', repos=repos, limit=top):
+            print("%s %s %s  %+d" % (repo, tag, asset, delta))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    api_url = args.api_url.rstrip('/')
+    if args.offline and args.no_cache:
+        sys.stderr.write("Error: --offline needs the cache\n")
+        exit(1)
+    if args.trend or args.top:
+        history = download_history(args.history)
+        for target in args.targets:
+            print_trends(history, target if '/' in target else target+'/*',
+                         args.days, args.top, args.trend)
+        history.close()
+        exit(0)
+    cache = None if args.no_cache else response_cache(args.cache_dir)
+    client = github_client(make_session(max(args.jobs, 1)), cache,
+                           args.ttl, args.offline, args.timeout,
+                           rate_limiter(max_wait=args.max_wait), args.retries)
+    downloads = {}
+    if os.path.isfile(args.history):
+        history = download_history(args.history)
+        downloads = history.totals()
+        history.close()
+    failed = 0
+    repos = []
+    for target in args.targets:
+        if '/' in target:
+            repos.append({'full_name': target})
+            continue
+        try:
+            repos.extend(user_repos(client, target))
+        except fetch_errors as e:
+            failed += 1
+            sys.stderr.write("Error: cannot list repositories of %s: %s\n" % (target, e))
+    full_names, seen = [], set()
+    for name in prioritize(repos, downloads):
+        if name not in seen: full_names.append(name)
+        seen.add(name)
+    if not full_names: exit(1 if failed else 0)
+    snapshot = []
+    #the rest of the repositories are fetched in the pool
+    #while the first one is printed as its pages arrive
+    pool = ThreadPool(max(1, min(args.jobs-1, len(full_names)-1)))
+    fetch = lambda full_name: fetch_report(client, full_name, args.oldest_first)
+    rest = pool.imap(fetch, full_names[1:])
+    counts = []
     try:
-        r = requests.get('https://api.github.com/repos/' + full_name + '/releases')
-        myobj = r.json()
- 
-        total_downloads = 0
-        for p in myobj[::-1]:
-            if "assets" in p:
-                for asset in p['assets']:
-                    total_downloads += asset['download_count']
-                    print("Tag: %s\nFile: %s\nCreated at: %s" %
-                          (p['tag_name'], asset['name'], asset['created_at']))
-                    print("Downloads: %d" % asset['download_count'])
-                    print("")
-            else:
-                print("No data")
-        print('Total downloads: %d' % total_downloads)
-    except:
-        pass
+        for line in release_lines(full_names[0],
+                                  iter_releases(client, full_names[0], args.oldest_first),
+                                  counts):
+            print(line)
+        snapshot.extend((full_names[0],)+c for c in counts)
+    except fetch_errors as e:
+        failed += 1
+        sys.stderr.write("Error: %s: %s\n" % (full_names[0], e))
+    for full_name, (lines, counts, error) in zip(full_names[1:], rest):
+        for line in lines: print(line)
+        if error is not None:
+            failed += 1
+            sys.stderr.write("Error: %s: %s\n" % (full_name, error))
+        else: snapshot.extend((full_name,)+c for c in counts)
+    pool.close()
+    #cached counts are not a measurement of this moment
+    if snapshot and not args.no_history and not args.offline:
+        history = download_history(args.history)
+        history.record(snapshot)
+        history.close()
+    if failed: exit(2)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+"""
+Tests of stats.py against a local stand-in of the GitHub API,
+and of its download history.
+
+    python -m unittest test_stats
+"""
+import os
+import json
+import time
+import shutil
+import datetime
+import tempfile
+import threading
+import unittest
+from multiprocessing.pool import ThreadPool
+try: from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError: from http.server import BaseHTTPRequestHandler, HTTPServer
+try: from SocketServer import ThreadingMixIn
+except ImportError: from socketserver import ThreadingMixIn
+try: from urlparse import urlparse, parse_qs
+except ImportError: from urllib.parse import urlparse, parse_qs
+
+import stats
+
+
+class stub_handler(BaseHTTPRequestHandler):
+    """
+    Answers with the route of the path: route(handler) -> (status, headers, JSON data).
+    The requests are logged as (path, {lowercase header: value}, client address).
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args): pass
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split('?')[0]
+        with server.lock:
+            headers = dict((k.lower(), v) for k, v in self.headers.items())
+            server.requests.append((path, headers, self.client_address))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            route = server.routes.get(path)
+            if route is None: status, headers, data = 404, {}, {'message': 'Not Found'}
+            else: status, headers, data = route(self)
+        finally:
+            with server.lock: server.active -= 1
+        body = b'' if status == 304 else json.dumps(data).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in headers.items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class stub_server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), stub_handler)
+        self.lock       = threading.Lock()
+        self.routes     = {}
+        self.requests   = []
+        self.active     = 0
+        self.max_active = 0
+        self.url        = 'http://127.0.0.1:%d' % self.server_address[1]
+
+    def paths(self, path):
+        return [r for r in self.requests if r[0] == path]
+
+
+def release(tag, asset, count):
+    return {'tag_name': tag, 'assets': [{'name': asset, 'download_count': count,
+                                         'created_at': '2016-01-01T00:00:00Z'}]}
+
+
+class stub_test(unittest.TestCase):
+    def setUp(self):
+        self.server = stub_server()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.old_api_url = stats.api_url
+        stats.api_url = self.server.url
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        stats.api_url = self.old_api_url
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def client(self, jobs=4, cache=None, **kwargs):
+        kwargs.setdefault('backoff', 0.01)
+        return stats.github_client(stats.make_session(jobs), cache, **kwargs)
+
+
+class concurrent_fetch_test(stub_test):
+    delay = 0.3
+    repos = 6
+
+    def setUp(self):
+        stub_test.setUp(self)
+        def slow_releases(i):
+            def route(handler):
+                time.sleep(self.delay)
+                return 200, {}, [release('v1.%d' % i, 'mod.zip', 10*i)]
+            return route
+        for i in range(self.repos):
+            self.server.routes['/repos/u/r%d/releases' % i] = slow_releases(i)
+        self.server.routes['/repos/u/broken/releases'] = \
+            lambda handler: (404, {}, {'message': 'Not Found'})
+
+    def test_concurrent(self):
+        client = self.client(jobs=self.repos)
+        names  = ['u/r%d' % i for i in range(self.repos)]
+        pool   = ThreadPool(self.repos)
+        start  = time.time()
+        results = pool.map(lambda name: stats.fetch_report(client, name), names)
+        elapsed = time.time()-start
+        pool.close()
+        #about as long as the slowest request, not the sum of them
+        self.assertLess(elapsed, self.delay*self.repos/2)
+        self.assertGreater(self.server.max_active, 1)
+        for i, (lines, counts, error) in enumerate(results):
+            self.assertIsNone(error)
+            self.assertEqual(counts, [('v1.%d' % i, 'mod.zip', 10*i)])
+            self.assertEqual(lines[-1], 'Total downloads: %d' % (10*i))
+
+    def test_keep_alive(self):
+        self.delay = 0
+        client = self.client(jobs=2)
+        for _i in range(3):
+            for i in range(self.repos): stats.fetch_report(client, 'u/r%d' % i)
+        #the requests of a single thread reuse its connection
+        self.assertEqual(len(set(r[2] for r in self.server.requests)), 1)
+
+    def test_error_per_repo(self):
+        self.delay = 0
+        client = self.client()
+        pool   = ThreadPool(2)
+        results = pool.map(lambda name: stats.fetch_report(client, name), ['u/r1', 'u/broken'])
+        pool.close()
+        self.assertIsNone(results[0][2])
+        lines, counts, error = results[1]
+        self.assertIsInstance(error, stats.api_error)
+        self.assertEqual(error.status, 404)
+        self.assertIn('Not Found', str(error))
+        self.assertEqual(counts, [])
+
+
+class cache_test(stub_test):
+    path = '/repos/u/r/releases'
+
+    def setUp(self):
+        stub_test.setUp(self)
+        def route(handler):
+            if handler.headers.get('If-None-Match') == '"v1"': return 304, {'ETag': '"v1"'}, None
+            return 200, {'ETag': '"v1"'}, [release('v1', 'mod.zip', 5)]
+        self.server.routes[self.path] = route
+        self.cache = stats.response_cache(self.tmp)
+
+    def test_etag_revalidation(self):
+        url = self.server.url+self.path
+        data, _next = self.client(cache=self.cache).get_page(url)
+        self.assertEqual(data[0]['tag_name'], 'v1')
+        data, _next = self.client(cache=self.cache).get_page(url)
+        self.assertEqual(data[0]['tag_name'], 'v1')
+        requests = self.server.paths(self.path)
+        self.assertEqual(len(requests), 2)
+        self.assertNotIn('if-none-match', requests[0][1])
+        self.assertEqual(requests[1][1].get('if-none-match'), '"v1"')
+
+    def test_ttl_and_offline(self):
+        url = self.server.url+self.path
+        self.client(cache=self.cache).get_page(url)
+        self.client(cache=self.cache, ttl=3600).get_page(url)
+        self.client(cache=self.cache, offline=True).get_page(url)
+        self.assertEqual(len(self.server.paths(self.path)), 1)
+        self.assertRaises(stats.offline_miss,
+                          self.client(cache=self.cache, offline=True).get_page,
+                          self.server.url+'/repos/u/other/releases')
+
+
+class pagination_test(stub_test):
+    def setUp(self):
+        stub_test.setUp(self)
+        def route(handler):
+            page = int(parse_qs(urlparse(handler.path).query).get('page', ['1'])[0])
+            headers = {}
+            if page < 3:
+                headers['Link'] = '<%s/users/u/repos?per_page=2&page=%d>; rel="next"' % \
+                    (self.server.url, page+1)
+            return 200, headers, [{'full_name': 'u/r%d' % (2*page+i)} for i in range(2)]
+        self.server.routes['/users/u/repos'] = route
+
+    def test_follows_links(self):
+        repos = stats.user_repos(self.client(), 'u')
+        self.assertEqual([r['full_name'] for r in repos], ['u/r%d' % i for i in range(7, 1, -1)])
+        self.assertEqual(len(self.server.paths('/users/u/repos')), 3)
+
+    def test_prioritize(self):
+        repos = [{'full_name': 'u/a', 'stargazers_count': 5},
+                 {'full_name': 'u/b', 'stargazers_count': 9},
+                 {'full_name': 'u/c'}]
+        self.assertEqual(stats.prioritize(repos), ['u/b', 'u/a', 'u/c'])
+        self.assertEqual(stats.prioritize(repos, {'u/c': 100}), ['u/c', 'u/b', 'u/a'])
+
+
+class rate_limit_test(stub_test):
+    path = '/repos/u/r/releases'
+
+    def respond(self, *responses):
+        """The route answers with the responses in turn, then with the last one"""
+        responses = list(responses)
+        def route(handler):
+            status, headers = responses.pop(0) if len(responses) > 1 else responses[0]
+            if status >= 400: return status, headers, {'message': 'error %d' % status}
+            return status, headers, [release('v1', 'mod.zip', 1)]
+        self.server.routes[self.path] = route
+        return self.server.url+self.path
+
+    def test_waits_for_reset(self):
+        reset = int(time.time())+2
+        limit = {'X-RateLimit-Limit': '60', 'X-RateLimit-Remaining': '0',
+                 'X-RateLimit-Reset': str(reset)}
+        url = self.respond((403, limit), (200, {}))
+        start = time.time()
+        data = self.client().get_json(url)
+        self.assertEqual(data[0]['tag_name'], 'v1')
+        self.assertGreaterEqual(time.time(), reset)
+        self.assertLess(time.time()-start, 5)
+        self.assertEqual(len(self.server.paths(self.path)), 2)
+
+    def test_retry_after(self):
+        url = self.respond((429, {'Retry-After': '0.5'}), (200, {}))
+        start = time.time()
+        self.client().get_json(url)
+        self.assertGreaterEqual(time.time()-start, 0.5)
+        self.assertEqual(len(self.server.paths(self.path)), 2)
+
+    def test_gives_up_on_long_wait(self):
+        limit = {'X-RateLimit-Limit': '60', 'X-RateLimit-Remaining': '0',
+                 'X-RateLimit-Reset': str(int(time.time())+3600)}
+        url = self.respond((403, limit))
+        client = self.client(limiter=stats.rate_limiter(max_wait=10))
+        self.assertRaises(stats.rate_limited, client.get_json, url)
+        #the budget is known to be exhausted, so the next request is not even made
+        self.assertRaises(stats.rate_limited, client.get_json, url)
+        self.assertEqual(len(self.server.paths(self.path)), 1)
+
+    def test_server_errors_are_retried(self):
+        url = self.respond((502, {}), (500, {}), (200, {}))
+        self.assertEqual(self.client().get_json(url)[0]['tag_name'], 'v1')
+        self.assertEqual(len(self.server.paths(self.path)), 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.respond((404, {}))
+        lines, counts, error = stats.fetch_report(self.client(), 'u/r')
+        self.assertIsInstance(error, stats.api_error)
+        self.assertEqual(error.status, 404)
+        self.assertIn('error 404', str(error))
+        self.assertEqual(len(self.server.paths(self.path)), 1)
+
+    def test_retries_are_limited(self):
+        url = self.respond((503, {}))
+        self.assertRaises(stats.api_error, self.client(retries=2).get_json, url)
+        self.assertEqual(len(self.server.paths(self.path)), 3)
+
+
+class rate_limiter_test(unittest.TestCase):
+    def test_spacing_below_low_water(self):
+        limiter = stats.rate_limiter(low_water=0.5)
+        reset = time.time()+100
+        limiter.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '10',
+                        'X-RateLimit-Reset': str(reset)})
+        self.assertAlmostEqual(limiter.reserve(), 0, places=2)
+        #the rest of the window is shared by the remaining requests
+        self.assertAlmostEqual(limiter.reserve(), 100/10.0, delta=0.1)
+        self.assertEqual(limiter.remaining, 8)
+
+    def test_no_spacing_with_enough_budget(self):
+        limiter = stats.rate_limiter()
+        limiter.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '90',
+                        'X-RateLimit-Reset': str(time.time()+100)})
+        self.assertEqual([round(limiter.reserve(), 2) for _i in range(5)], [0]*5)
+
+    def test_out_of_order_responses(self):
+        limiter = stats.rate_limiter()
+        reset = str(time.time()+100)
+        limiter.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '50',
+                        'X-RateLimit-Reset': reset})
+        limiter.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '60',
+                        'X-RateLimit-Reset': reset})
+        self.assertEqual(limiter.remaining, 50)
+
+
+class history_test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.history = stats.download_history(os.path.join(self.tmp, 'history.sqlite'))
+        self.day = time.mktime(datetime.date(2016, 3, 1).timetuple())
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.tmp)
+
+    def record(self, hour, counts):
+        self.history.record([('u/r', tag, 'mod.zip', n) for tag, n in counts],
+                            self.day+hour*3600)
+
+    def test_daily_starts_at_first_snapshot(self):
+        self.record(10, [('v1', 1000)])
+        self.record(20, [('v1', 1010)])
+        self.record(24+10, [('v1', 1050), ('v2', 5)])
+        days = self.history.daily(0)
+        self.assertEqual(days, [(datetime.date(2016, 3, 1), 10),
+                                (datetime.date(2016, 3, 2), 45)])
+
+    def test_daily_single_snapshot(self):
+        self.record(10, [('v1', 1000)])
+        self.assertEqual(self.history.daily(0), [(datetime.date(2016, 3, 1), 0)])
+
+    def test_deltas(self):
+        self.record(10, [('v1', 1000)])
+        self.record(24+10, [('v1', 1050), ('v2', 5)])
+        self.assertEqual(self.history.deltas(0), [('u/r', 'v1', 50), ('u/r', 'v2', 5)])
+        self.assertEqual(self.history.deltas(0, by='repo'), [('u/r', 55)])
+        self.assertEqual(self.history.totals(), {'u/r': 1055})
+
+
+if __name__ == '__main__':
+    unittest.main()